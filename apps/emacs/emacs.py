@@ -102,6 +102,18 @@ class Actions:
 
 @ctx.action_class("user")
 class UserActions:
+    def word_keys(direction: str, count: int, extend: bool):
+        if not extend:
+            command = "backward-word" if direction == "left" else "forward-word"
+            actions.user.emacs(command, count)
+            return
+        if direction == "left":
+            action = actions.edit.extend_word_left
+        else:
+            action = actions.edit.extend_word_right
+        for _ in range(count):
+            action()
+
     def cut_line():
         actions.edit.line_start()
         actions.user.emacs("kill-line", 1)
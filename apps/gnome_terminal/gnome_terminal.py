@@ -25,6 +25,15 @@ class user_actions:
     def tab_jump(number):
         actions.key(f"alt-{number}")
 
+    # afaik not possible in gnome-terminal, see extend_left below
+    def cursor_keys(direction: str, count: int, extend: bool):
+        if not extend:
+            actions.key(f"{direction}:{count}")
+
+    def word_keys(direction: str, count: int, extend: bool):
+        if not extend:
+            actions.key(f"ctrl-{direction}:{count}")
+
 
 @ctx.action_class("app")
 class app_actions:
@@ -305,6 +305,18 @@ class WinActions:
 @ctx.action_class("user")
 class UserActions:
 
+    def word_keys(direction: str, count: int, extend: bool):
+        if not extend:
+            actions.next(direction, count, extend)
+            return
+        # Extending by words runs an IDE action, not the platform's key
+        if direction == "left":
+            action = actions.edit.extend_word_left
+        else:
+            action = actions.edit.extend_word_right
+        for _ in range(count):
+            action()
+
     def command_server_directory() -> str:
         return "jetbrains-command-server"
 
@@ -15,6 +15,12 @@ app: warp
 
 @ctx.action_class("user")
 class UserActions:
+    def word_keys(direction: str, count: int, extend: bool):
+        if extend:
+            actions.next(direction, count, extend)
+        else:
+            actions.key(f"alt-{direction}:{count}")
+
     def tab_jump(number: int):
         if number < 9:
             actions.key(f"cmd-{number}")
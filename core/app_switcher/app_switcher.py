@@ -5,7 +5,9 @@ import time
 from pathlib import Path
 
 import talon
-from talon import Context, Module, actions, app, fs, imgui, ui
+from talon import Context, Module, actions, app, imgui, ui
+
+from ..settings_files import register_settings_file
 
 # Construct a list of spoken form overrides for application names (similar to how homophone list is managed)
 # These overrides are used *instead* of the generated spoken forms for the given app name or .exe (on Windows)
@@ -289,25 +291,26 @@ def update_running_list():
     ctx.lists["self.running"] = running
 
 
-def update_overrides(name, flags):
-    """Updates the overrides and excludes lists"""
-    global overrides, excludes
-
-    if name is None or os.path.normcase(name) == override_file_path:
-        overrides = {}
-        excludes = set()
+def read_overrides(path: Path) -> tuple[dict[str, str], set[str]]:
+    """Reads the overrides and excludes lists"""
+    overrides = {}
+    excludes = set()
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip().lower()
+            line = line.split(",")
+            if len(line) == 2 and line[0] != "Spoken form":
+                overrides[line[0]] = line[1].strip()
+            if len(line) == 1:
+                excludes.add(line[0].strip())
+    return overrides, excludes
 
-        # print("update_overrides")
-        with open(override_file_path) as f:
-            for line in f:
-                line = line.rstrip().lower()
-                line = line.split(",")
-                if len(line) == 2 and line[0] != "Spoken form":
-                    overrides[line[0]] = line[1].strip()
-                if len(line) == 1:
-                    excludes.add(line[0].strip())
 
-        update_running_list()
+def update_overrides(lists: tuple[dict[str, str], set[str]]):
+    """Updates the overrides and excludes lists"""
+    global overrides, excludes
+    overrides, excludes = lists
+    update_running_list()
 
 
 @mod.action_class
@@ -451,8 +454,7 @@ def ui_event(event, arg):
 
 
 def on_ready():
-    update_overrides(None, None)
-    fs.watch(overrides_directory, update_overrides)
+    register_settings_file(Path(override_file_path), read_overrides, update_overrides)
     update_launch_list()
     update_running_list()
     ui.register("", ui_event)
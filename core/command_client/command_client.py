@@ -1,14 +1,21 @@
+import os
 from pathlib import Path
 from typing import Any
 
-from talon import Context, Module, actions, speech_system
+from talon import Context, Module, actions
 
+from ..phrase_profiler.phrase_profiler import register_phrase_handler
 from .rpc_client.get_communication_dir_path import get_communication_dir_path
+from .rpc_client.types import CommandResult
 
 # Indicates whether a pre-phrase signal was emitted during the course of the
 # current phrase
 did_emit_pre_phrase_signal = False
 
+# Paths of the signal files touched before, by communication dir name and signal
+# name
+signal_files: dict[tuple[str, str], Path] = {}
+
 mod = Module()
 ctx = Context()
 mac_ctx = Context()
@@ -32,6 +39,7 @@ def run_command(
     *args,
     wait_for_finish: bool = False,
     return_command_output: bool = False,
+    settle: bool = True,
 ):
     """Runs a command, using command server if available
 
@@ -40,6 +48,7 @@ def run_command(
         args: The arguments to the command.
         wait_for_finish (bool, optional): Whether to wait for the command to finish before returning. Defaults to False.
         return_command_output (bool, optional): Whether to return the output of the command. Defaults to False.
+        settle (bool, optional): Whether to wait for the application's UI to settle afterwards. Defaults to True.
 
     Raises:
         Exception: If there is an issue with the file-based communication, or
@@ -59,6 +68,37 @@ def run_command(
         args,
         wait_for_finish,
         return_command_output,
+        settle,
+    )
+
+
+def run_commands(
+    commands: list[tuple[str, list[Any]]],
+    wait_for_finish: bool = False,
+    return_command_output: bool = False,
+    settle: bool = True,
+) -> list[CommandResult]:
+    """Runs several commands with a single request, using command server if available
+
+    Args:
+        commands (list): The (command ID, arguments) of each command to run, in order.
+        wait_for_finish (bool, optional): Whether to wait for the commands to finish before returning. Defaults to False.
+        return_command_output (bool, optional): Whether to return the output of the commands. Defaults to False.
+        settle (bool, optional): Whether to wait for the application's UI to settle afterwards. Defaults to True.
+
+    Raises:
+        Exception: If there is an issue with the file-based communication
+
+    Returns:
+        list[CommandResult]: The return value and error of each command.
+    """
+    return actions.user.rpc_client_run_commands(
+        actions.user.command_server_directory(),
+        actions.user.trigger_command_server_command_execution,
+        commands,
+        wait_for_finish,
+        return_command_output,
+        settle,
     )
 
 
@@ -120,6 +160,17 @@ class Actions:
             return_command_output=True,
         )
 
+    def run_rpc_commands(
+        commands: list, wait_for_finish: bool = False, settle: bool = True
+    ) -> list:
+        """Execute a list of (command ID, arguments) via RPC with a single request.
+        Returns the return value and error of each command."""
+        return run_commands(
+            [(command_id, list(args)) for command_id, args in commands],
+            wait_for_finish=wait_for_finish,
+            settle=settle,
+        )
+
     def command_server_directory() -> str:
         """Return the directory of the command server"""
 
@@ -151,7 +202,7 @@ class MacUserActions:
 @ctx.action_class("user")
 class UserActions:
     def emit_pre_phrase_signal():
-        get_signal_path("prePhrase").touch()
+        touch_signal("prePhrase")
         return True
 
 
@@ -181,6 +232,30 @@ def get_signal_path(name: str) -> Path:
     return signal_dir / name
 
 
+def touch_signal(name: str):
+    """
+    Updates the modification time of a signal file, creating it if needed.
+    Runs on every phrase, so the signal file is only looked up again if
+    touching it fails.
+
+    Args:
+        name (str): The name of the signal
+    """
+    key = (actions.user.command_server_directory(), name)
+    signal_path = signal_files.get(key)
+
+    if signal_path is not None:
+        try:
+            os.utime(signal_path)
+            return
+        except OSError:
+            del signal_files[key]
+
+    signal_path = get_signal_path(name)
+    signal_path.touch()
+    signal_files[key] = signal_path
+
+
 def pre_phrase(_: Any):
     try:
         global did_emit_pre_phrase_signal
@@ -195,5 +270,5 @@ def post_phrase(_: Any):
     did_emit_pre_phrase_signal = False
 
 
-speech_system.register("pre:phrase", pre_phrase)
-speech_system.register("post:phrase", post_phrase)
+register_phrase_handler("pre:phrase", pre_phrase)
+register_phrase_handler("post:phrase", post_phrase)
@@ -1,9 +1,19 @@
+import ctypes
+import ctypes.util
 import json
+import logging
+import os
+import select
+import struct
+import sys
+import threading
 import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional, Union
 
-from talon import actions
+from talon import actions, fs
+
+logger = logging.getLogger(__name__)
 
 # The amount of time to wait for application to perform a command, in seconds
 RPC_COMMAND_TIMEOUT_SECONDS = 3.0
@@ -12,10 +22,102 @@ RPC_COMMAND_TIMEOUT_SECONDS = 3.0
 # long to sleep the first time
 MINIMUM_SLEEP_TIME_SECONDS = 0.0005
 
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class InotifyWaiter:
+    """Waits for a file in a directory to be closed after writing or moved into
+    place, using inotify on Linux"""
+
+    def __init__(self, dir_path: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        watch = libc.inotify_add_watch(
+            self.fd, os.fsencode(dir_path), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if watch < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {dir_path}")
+
+    def read_names(self) -> set[str]:
+        names = set()
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                names.add(os.fsdecode(data[offset : offset + length].rstrip(b"\0")))
+                offset += length
+
+    def wait(self, name: str, timeout: float) -> bool:
+        """Returns True once <name> is written, or False after <timeout> seconds"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+            if readable and name in self.read_names():
+                return True
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                return False
+
+
+class FsWatchWaiter:
+    """Waits for a file in a directory to change, using Talon's fs.watch"""
+
+    def __init__(self, dir_path: Path):
+        self.changed: dict[str, threading.Event] = {}
+        fs.watch(str(dir_path), self.on_change)
+
+    def on_change(self, path: str, flags):
+        event = self.changed.get(Path(path).name)
+        if event is not None:
+            event.set()
+
+    def wait(self, name: str, timeout: float) -> bool:
+        """Returns True once <name> changes, or False after <timeout> seconds"""
+        event = self.changed.setdefault(name, threading.Event())
+        changed = event.wait(timeout)
+        event.clear()
+        return changed
+
+
+waiters: dict[Path, Optional[Union[InotifyWaiter, FsWatchWaiter]]] = {}
+
+
+def get_waiter(dir_path: Path) -> Optional[Union[InotifyWaiter, FsWatchWaiter]]:
+    """Returns the waiter for files in <dir_path>, or None to poll instead"""
+    if dir_path not in waiters:
+        waiter = None
+        waiter_classes = [FsWatchWaiter]
+        if sys.platform.startswith("linux"):
+            waiter_classes.insert(0, InotifyWaiter)
+        for waiter_class in waiter_classes:
+            try:
+                waiter = waiter_class(dir_path)
+                break
+            except Exception as e:
+                logger.warning(f"Can't watch {dir_path} for responses: {e}")
+        waiters[dir_path] = waiter
+    return waiters[dir_path]
+
 
 def read_json_with_timeout(path: Path) -> Any:
     """Repeatedly tries to read a json object from the given path, waiting
-    until there is a trailing new line indicating that the write is complete
+    until there is a trailing new line indicating that the write is complete.
+    Between tries, waits for the file to be written, falling back to polling
+    with exponential back off if the directory can't be watched or a change is
+    missed.
 
     Args:
         path (str): The path to read from
@@ -28,6 +130,7 @@ def read_json_with_timeout(path: Path) -> Any:
     """
     timeout_time = time.perf_counter() + RPC_COMMAND_TIMEOUT_SECONDS
     sleep_time = MINIMUM_SLEEP_TIME_SECONDS
+    waiter = get_waiter(path.parent)
     while True:
         try:
             raw_text = path.read_text()
@@ -38,7 +141,10 @@ def read_json_with_timeout(path: Path) -> Any:
             # If not found, keep waiting
             pass
 
-        actions.sleep(sleep_time)
+        if waiter is None:
+            actions.sleep(sleep_time)
+        else:
+            waiter.wait(path.name, sleep_time)
 
         time_left = timeout_time - time.perf_counter()
 
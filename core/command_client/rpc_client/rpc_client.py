@@ -1,18 +1,239 @@
 import logging
+import time
+from pathlib import Path
 from typing import Any, Callable
 from uuid import uuid4
 
-from talon import Module, actions
+from talon import Module, actions, settings
 
+from ...phrase_profiler.phrase_profiler import RollingTimings
 from .get_communication_dir_path import get_communication_dir_path
 from .read_json_with_timeout import read_json_with_timeout
 from .robust_unlink import robust_unlink
-from .types import NoFileServerException, Request
+from .socket_transport import send_socket_request
+from .types import Command, CommandResult, NoFileServerException, Request
 from .write_request import write_request
 
 logger = logging.getLogger(__name__)
 
 mod = Module()
+mod.setting(
+    "rpc_client_settle_delay",
+    type=int,
+    default=25,
+    desc="How long to wait in milliseconds after an RPC command for the application's UI to settle, unless the command server reports that it already has",
+)
+
+# Communication directories whose server ran only the first command of a batch
+servers_without_batch_support: set[str] = set()
+
+# Time from sending a request to receiving its response, in milliseconds
+round_trip_timings = RollingTimings()
+
+# Whether the server reported that the UI settled before it sent the last response
+last_response_settled = False
+
+# Time spent waiting for the UI to settle this session, in milliseconds
+settle_time_total = 0.0
+settle_count = 0
+
+
+def send_file_request(
+    communication_dir_path: Path,
+    trigger_command_execution: Callable,
+    request: Request,
+) -> dict:
+    """Writes <request> to the request file, triggers its execution and reads
+    the response file"""
+    request_path = communication_dir_path / "request.json"
+    response_path = communication_dir_path / "response.json"
+
+    # First, write the request to the request file, which makes us the sole
+    # owner because all other processes will try to open it with 'x'
+    write_request(request, request_path)
+
+    # We clear the response file if it does exist, though it shouldn't
+    if response_path.exists():
+        print("WARNING: Found old response file")
+        robust_unlink(response_path)
+
+    # Then, perform keystroke telling application to execute the command in the
+    # request file.  Because only the active application instance will accept
+    # keypresses, we can be sure that the active application instance will be the
+    # one to execute the command.
+    trigger_command_execution()
+
+    try:
+        decoded_contents = read_json_with_timeout(response_path)
+    finally:
+        # NB: We remove response file first because we want to do this while we
+        # still own the request file
+        robust_unlink(response_path)
+        robust_unlink(request_path)
+
+    return decoded_contents
+
+
+def send_request(
+    dir_name: str,
+    trigger_command_execution: Callable,
+    request: Request,
+) -> dict:
+    """Sends <request> over the server's socket if it has one, otherwise through
+    the request file, and returns the decoded response. Errors reported by the
+    application are left in the response for the caller to handle.
+
+    Raises:
+        Exception: If there is an issue with the communication
+    """
+    communication_dir_path = get_communication_dir_path(dir_name)
+
+    if not communication_dir_path.exists():
+        logger.warning(
+            f"Communication directory not found at: {communication_dir_path}"
+        )
+        if request.args or request.commands or request.return_command_output:
+            raise Exception(
+                "Communication directory not found. Must use command-server extension for advanced commands"
+            )
+        raise NoFileServerException("Communication directory not found")
+
+    start = time.perf_counter()
+
+    # Servers listening on a socket don't need the request file or keystroke
+    decoded_contents = send_socket_request(communication_dir_path, request.to_dict())
+    if decoded_contents is None:
+        decoded_contents = send_file_request(
+            communication_dir_path, trigger_command_execution, request
+        )
+    round_trip_timings.add((time.perf_counter() - start) * 1000)
+
+    global last_response_settled
+    last_response_settled = decoded_contents.get("settled", False)
+
+    if decoded_contents["uuid"] != request.uuid:
+        raise Exception("uuids did not match")
+
+    for warning in decoded_contents["warnings"]:
+        print(f"WARNING: {warning}")
+
+    return decoded_contents
+
+
+def run_single_command(
+    dir_name: str,
+    trigger_command_execution: Callable,
+    command: Command,
+    wait_for_finish: bool,
+    return_command_output: bool,
+) -> Any:
+    # Generate uuid that will be mirrored back to us by command server for
+    # sanity checking
+    request = Request(
+        command_id=command.command_id,
+        args=command.args,
+        wait_for_finish=wait_for_finish,
+        return_command_output=return_command_output,
+        uuid=str(uuid4()),
+    )
+    decoded_contents = send_request(dir_name, trigger_command_execution, request)
+
+    if decoded_contents["error"] is not None:
+        raise Exception(decoded_contents["error"])
+
+    return decoded_contents["returnValue"]
+
+
+def run_commands_separately(
+    dir_name: str,
+    trigger_command_execution: Callable,
+    commands: list[Command],
+    wait_for_finish: bool,
+    return_command_output: bool,
+) -> list[CommandResult]:
+    results = []
+    for command in commands:
+        try:
+            return_value = run_single_command(
+                dir_name,
+                trigger_command_execution,
+                command,
+                wait_for_finish,
+                return_command_output,
+            )
+            results.append(CommandResult(return_value, None))
+        except NoFileServerException:
+            raise
+        except Exception as e:
+            results.append(CommandResult(None, str(e)))
+    return results
+
+
+def run_batch(
+    dir_name: str,
+    trigger_command_execution: Callable,
+    commands: list[Command],
+    wait_for_finish: bool,
+    return_command_output: bool,
+) -> list[CommandResult]:
+    """Sends <commands> in one request, falling back to one request per command
+    for servers without batch support"""
+    if len(commands) == 1 or dir_name in servers_without_batch_support:
+        return run_commands_separately(
+            dir_name,
+            trigger_command_execution,
+            commands,
+            wait_for_finish,
+            return_command_output,
+        )
+
+    request = Request(
+        command_id=commands[0].command_id,
+        args=commands[0].args,
+        wait_for_finish=wait_for_finish,
+        return_command_output=return_command_output,
+        uuid=str(uuid4()),
+        commands=commands,
+    )
+    decoded_contents = send_request(dir_name, trigger_command_execution, request)
+
+    if "results" in decoded_contents:
+        if decoded_contents["error"] is not None:
+            raise Exception(decoded_contents["error"])
+        return [
+            CommandResult(result.get("returnValue"), result.get("error"))
+            for result in decoded_contents["results"]
+        ]
+
+    # The server ignored the batch and only ran the first command
+    servers_without_batch_support.add(dir_name)
+    first_result = CommandResult(
+        decoded_contents["returnValue"], decoded_contents["error"]
+    )
+    return [first_result] + run_commands_separately(
+        dir_name,
+        trigger_command_execution,
+        commands[1:],
+        wait_for_finish,
+        return_command_output,
+    )
+
+
+def settle_ui(settle: bool):
+    """Gives the application time to update its UI after a command, unless the
+    caller doesn't need it or the server acknowledged that the UI settled"""
+    global settle_time_total, settle_count
+    if not settle or last_response_settled:
+        return
+
+    delay = settings.get("user.rpc_client_settle_delay")
+    if delay <= 0:
+        return
+
+    start = time.perf_counter()
+    actions.sleep(f"{delay}ms")
+    settle_time_total += (time.perf_counter() - start) * 1000
+    settle_count += 1
 
 
 @mod.action_class
@@ -24,6 +245,7 @@ class Actions:
         args: list[Any],
         wait_for_finish: bool = False,
         return_command_output: bool = False,
+        settle: bool = True,
     ):
         """Runs a command, using command server if available
 
@@ -34,6 +256,7 @@ class Actions:
             args: The arguments to the command.
             wait_for_finish (bool, optional): Whether to wait for the command to finish before returning. Defaults to False.
             return_command_output (bool, optional): Whether to return the output of the command. Defaults to False.
+            settle (bool, optional): Whether to wait for the application's UI to settle afterwards. Defaults to True.
 
         Raises:
             Exception: If there is an issue with the file-based communication, or
@@ -42,65 +265,67 @@ class Actions:
         Returns:
             Object: The response from the command, if requested.
         """
-        communication_dir_path = get_communication_dir_path(dir_name)
-
-        if not communication_dir_path.exists():
-            logger.warning(
-                f"Communication directory not found at: {communication_dir_path}"
-            )
-            if args or return_command_output:
-                raise Exception(
-                    "Communication directory not found. Must use command-server extension for advanced commands"
-                )
-            raise NoFileServerException("Communication directory not found")
-
-        request_path = communication_dir_path / "request.json"
-        response_path = communication_dir_path / "response.json"
-
-        # Generate uuid that will be mirrored back to us by command server for
-        # sanity checking
-        uuid = str(uuid4())
-
-        request = Request(
-            command_id=command_id,
-            args=args,
-            wait_for_finish=wait_for_finish,
-            return_command_output=return_command_output,
-            uuid=uuid,
+        return_value = run_single_command(
+            dir_name,
+            trigger_command_execution,
+            Command(command_id, args),
+            wait_for_finish,
+            return_command_output,
         )
 
-        # First, write the request to the request file, which makes us the sole
-        # owner because all other processes will try to open it with 'x'
-        write_request(request, request_path)
+        settle_ui(settle)
 
-        # We clear the response file if it does exist, though it shouldn't
-        if response_path.exists():
-            print("WARNING: Found old response file")
-            robust_unlink(response_path)
+        return return_value
 
-        # Then, perform keystroke telling application to execute the command in the
-        # request file.  Because only the active application instance will accept
-        # keypresses, we can be sure that the active application instance will be the
-        # one to execute the command.
-        trigger_command_execution()
+    def rpc_client_run_commands(
+        dir_name: str,
+        trigger_command_execution: Callable,
+        commands: list[tuple[str, list[Any]]],
+        wait_for_finish: bool = False,
+        return_command_output: bool = False,
+        settle: bool = True,
+    ) -> list[CommandResult]:
+        """Runs several commands with a single request and trigger, using command
+        server if available. Falls back to one request per command if the server
+        doesn't support batches.
 
-        try:
-            decoded_contents = read_json_with_timeout(response_path)
-        finally:
-            # NB: We remove response file first because we want to do this while we
-            # still own the request file
-            robust_unlink(response_path)
-            robust_unlink(request_path)
+        Args:
+            dir_name (str): The name of the directory to use for communication.
+            trigger_command_execution (Callable): The function to call to trigger command execution.
+            commands (list): The (command ID, arguments) of each command to run, in order.
+            wait_for_finish (bool, optional): Whether to wait for the commands to finish before returning. Defaults to False.
+            return_command_output (bool, optional): Whether to return the output of the commands. Defaults to False.
+            settle (bool, optional): Whether to wait for the application's UI to settle afterwards. Defaults to True.
 
-        if decoded_contents["uuid"] != uuid:
-            raise Exception("uuids did not match")
+        Raises:
+            Exception: If there is an issue with the file-based communication
 
-        for warning in decoded_contents["warnings"]:
-            print(f"WARNING: {warning}")
+        Returns:
+            list[CommandResult]: The return value and error of each command.
+        """
+        if not commands:
+            return []
 
-        if decoded_contents["error"] is not None:
-            raise Exception(decoded_contents["error"])
+        results = run_batch(
+            dir_name,
+            trigger_command_execution,
+            [Command(command_id, list(args)) for command_id, args in commands],
+            wait_for_finish,
+            return_command_output,
+        )
 
-        actions.sleep("25ms")
+        settle_ui(settle)
+
+        return results
+
+    def rpc_client_latency() -> str:
+        """Returns the p50 and p99 round trip latency of recent RPC commands"""
+        return (
+            f"p50 {round_trip_timings.percentile(50):.1f} ms, "
+            f"p99 {round_trip_timings.percentile(99):.1f} ms "
+            f"over {len(round_trip_timings)} commands"
+        )
 
-        return decoded_contents["returnValue"]
+    def rpc_client_settle_time() -> str:
+        """Returns the time spent waiting for the UI to settle after RPC commands this session"""
+        return f"{settle_time_total:.0f} ms over {settle_count} commands"
@@ -0,0 +1,99 @@
+import json
+import socket
+import struct
+from pathlib import Path
+from typing import Any, Optional
+
+from .read_json_with_timeout import RPC_COMMAND_TIMEOUT_SECONDS
+
+# Name of the Unix domain socket a server may listen on in the communication dir.
+# Unlike with the trigger keystroke, the server is responsible for running the
+# command in the focused application instance.
+SOCKET_NAME = "request.sock"
+
+# Messages are a 4 byte big-endian length followed by that many bytes of json
+MESSAGE_HEADER = struct.Struct(">I")
+
+# Open connection to the server in each communication dir
+connections: dict[Path, socket.socket] = {}
+
+
+def send_message(connection: socket.socket, body: Any):
+    data = json.dumps(body).encode("utf-8")
+    connection.sendall(MESSAGE_HEADER.pack(len(data)) + data)
+
+
+def receive_exactly(connection: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = connection.recv(size)
+        if not chunk:
+            raise ConnectionError("Connection closed by server")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def receive_message(connection: socket.socket) -> Any:
+    (size,) = MESSAGE_HEADER.unpack(receive_exactly(connection, MESSAGE_HEADER.size))
+    return json.loads(receive_exactly(connection, size))
+
+
+def get_connection(communication_dir_path: Path) -> Optional[socket.socket]:
+    """Returns the connection to the server's socket, or None if it doesn't
+    listen on one"""
+    connection = connections.get(communication_dir_path)
+    if connection is not None:
+        return connection
+
+    socket_path = communication_dir_path / SOCKET_NAME
+    if not hasattr(socket, "AF_UNIX") or not socket_path.exists():
+        return None
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(RPC_COMMAND_TIMEOUT_SECONDS)
+    try:
+        connection.connect(str(socket_path))
+    except OSError:
+        # Left behind by a server that is no longer running
+        connection.close()
+        return None
+
+    connections[communication_dir_path] = connection
+    return connection
+
+
+def close_connection(communication_dir_path: Path):
+    connection = connections.pop(communication_dir_path, None)
+    if connection is not None:
+        connection.close()
+
+
+def send_socket_request(communication_dir_path: Path, body: dict) -> Optional[dict]:
+    """Sends a request over the server's socket and returns its response, or
+    None if the server doesn't listen on a socket and the file protocol should
+    be used instead.
+
+    Raises:
+        Exception: If the connection fails after the request was sent, so it
+        may have been executed
+    """
+    for _ in range(2):
+        connection = get_connection(communication_dir_path)
+        if connection is None:
+            return None
+
+        try:
+            send_message(connection, body)
+        except OSError:
+            # The server closed a connection we held on to, e.g. after a restart
+            close_connection(communication_dir_path)
+            continue
+
+        try:
+            return receive_message(connection)
+        except (OSError, ValueError) as e:
+            close_connection(communication_dir_path)
+            raise Exception(f"Failed to read response from socket: {e}")
+
+    return None
@@ -1,5 +1,17 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Optional
+
+
+@dataclass
+class Command:
+    command_id: str
+    args: list[Any]
+
+    def to_dict(self):
+        return {
+            "commandId": self.command_id,
+            "args": self.args,
+        }
 
 
 @dataclass
@@ -9,15 +21,27 @@ class Request:
     wait_for_finish: bool
     return_command_output: bool
     uuid: str
+    # The commands of a batch request. Servers without batch support ignore
+    # this and only run the first command, in command_id and args.
+    commands: Optional[list[Command]] = None
 
     def to_dict(self):
-        return {
+        body = {
             "commandId": self.command_id,
             "args": self.args,
             "waitForFinish": self.wait_for_finish,
             "returnCommandOutput": self.return_command_output,
             "uuid": self.uuid,
         }
+        if self.commands is not None:
+            body["commands"] = [command.to_dict() for command in self.commands]
+        return body
+
+
+@dataclass
+class CommandResult:
+    return_value: Any
+    error: Optional[str]
 
 
 class NoFileServerException(Exception):
@@ -2,13 +2,13 @@ import itertools
 import re
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Any, List, Mapping, Optional
+from typing import Any, Iterable, List, Mapping, Optional
 
 from talon import Module, actions
 
 from .keys.symbols import symbols_for_create_spoken_forms
 from .numbers.numbers import digits_map, scales, teens, tens
-from .user_settings import track_csv_list
+from .user_settings import CsvListDiff, track_csv_list
 
 mod = Module()
 
@@ -41,11 +41,16 @@ def update_regex():
 update_regex()
 
 
-@track_csv_list("file_extensions.csv", headers=("File extension", "Name"))
-def on_extensions(values):
+@track_csv_list(
+    "file_extensions.csv", headers=("File extension", "Name"), with_diff=True
+)
+def on_extensions(values, diff: CsvListDiff):
     global FILE_EXTENSIONS_REGEX
     global file_extensions
     file_extensions = values
+    # The regex only depends on the extensions, not on their spoken forms
+    if not diff.changed and set(diff.added.values()) == set(diff.removed.values()):
+        return
     FILE_EXTENSIONS_REGEX = "|".join(
         re.escape(file_extension.strip()) + "$" for file_extension in values.values()
     )
@@ -459,6 +464,118 @@ class SpeakableItem:
     value: Any
 
 
+def generate_spoken_forms(
+    source: str,
+    words_to_exclude: Optional[list[str]] = None,
+    minimum_term_length: int = DEFAULT_MINIMUM_TERM_LENGTH,
+    generate_subsequences: bool = True,
+) -> list[str]:
+    """Creates spoken forms for <source>, like user.create_spoken_forms. Doesn't
+    use Talon APIs, so it can run on worker threads."""
+    spoken_forms_without_symbols = create_spoken_forms_from_regex(
+        source, REGEX_NO_SYMBOLS
+    )
+
+    # todo: this could probably be optimized out if there's no symbols
+    spoken_forms_with_symbols = create_spoken_forms_from_regex(
+        source, REGEX_WITH_SYMBOLS
+    )
+
+    # some may be identical, so ensure the list is reduced
+    spoken_forms = set(spoken_forms_with_symbols + spoken_forms_without_symbols)
+
+    # only generate the subsequences if requested
+    if generate_subsequences:
+        # todo: do we care about the subsequences that are excluded.
+        # the only one that seems relevant are the full spoken form for
+        spoken_forms.update(
+            generate_string_subsequences(
+                spoken_forms_without_symbols[-1],
+                words_to_exclude or [],
+                minimum_term_length,
+            )
+        )
+
+    # Avoid empty spoken forms.
+    return [x for x in spoken_forms if x]
+
+
+class SpokenFormsBuilder:
+    """Spoken forms for a changing set of sources, with conflict resolution.
+    Adding a source only creates the spoken forms of that source, and removing
+    one only resolves the conflicts of its spoken forms again."""
+
+    def __init__(
+        self,
+        words_to_exclude: Optional[list[str]] = None,
+        minimum_term_length: int = DEFAULT_MINIMUM_TERM_LENGTH,
+        generate_subsequences: bool = True,
+    ):
+        self.words_to_exclude = words_to_exclude
+        self.minimum_term_length = minimum_term_length
+        self.generate_subsequences = generate_subsequences
+        # The spoken forms of each source, by name
+        self.sources: dict[str, list[str]] = {}
+        self.items: defaultdict[str, list[SpeakableItem]] = defaultdict(list)
+        self.spoken_forms: dict[str, Any] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sources
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def update(
+        self,
+        added: Optional[Mapping[str, Any]] = None,
+        removed: Iterable[str] = (),
+    ) -> dict[str, Any]:
+        """Removes the sources named in <removed>, adds the sources in <added>
+        and returns the resolved spoken forms. The returned dict is replaced,
+        not changed, by later updates."""
+        changed_forms = set()
+
+        for name in removed:
+            spoken_forms = self.sources.pop(name, None)
+            if spoken_forms is None:
+                continue
+            for spoken_form in spoken_forms:
+                items = self.items[spoken_form]
+                items[:] = [item for item in items if item.name != name]
+            changed_forms.update(spoken_forms)
+
+        for name, value in (added or {}).items():
+            if name in self.sources:
+                continue
+            spoken_forms = generate_spoken_forms(
+                name,
+                self.words_to_exclude,
+                self.minimum_term_length,
+                self.generate_subsequences,
+            )
+            self.sources[name] = spoken_forms
+            for spoken_form in spoken_forms:
+                self.items[spoken_form].append(SpeakableItem(name, value))
+            changed_forms.update(spoken_forms)
+
+        final_spoken_forms = dict(self.spoken_forms)
+        for spoken_form in changed_forms:
+            spoken_form_sources = self.items[spoken_form]
+            if not spoken_form_sources:
+                del self.items[spoken_form]
+                final_spoken_forms.pop(spoken_form, None)
+            elif len(spoken_form_sources) > 1:
+                final_spoken_forms[spoken_form] = min(
+                    spoken_form_sources,
+                    key=lambda speakable_item: len(speakable_item.name),
+                ).value
+            else:
+                final_spoken_forms[spoken_form] = spoken_form_sources[0].value
+
+        self.spoken_forms = final_spoken_forms
+        return final_spoken_forms
+
+
 @mod.action_class
 class Actions:
     def create_spoken_forms(
@@ -468,34 +585,10 @@ class Actions:
         generate_subsequences: bool = True,
     ) -> list[str]:
         """Create spoken forms for a given source"""
-
-        spoken_forms_without_symbols = create_spoken_forms_from_regex(
-            source, REGEX_NO_SYMBOLS
+        return generate_spoken_forms(
+            source, words_to_exclude, minimum_term_length, generate_subsequences
         )
 
-        # todo: this could probably be optimized out if there's no symbols
-        spoken_forms_with_symbols = create_spoken_forms_from_regex(
-            source, REGEX_WITH_SYMBOLS
-        )
-
-        # some may be identical, so ensure the list is reduced
-        spoken_forms = set(spoken_forms_with_symbols + spoken_forms_without_symbols)
-
-        # only generate the subsequences if requested
-        if generate_subsequences:
-            # todo: do we care about the subsequences that are excluded.
-            # the only one that seems relevant are the full spoken form for
-            spoken_forms.update(
-                generate_string_subsequences(
-                    spoken_forms_without_symbols[-1],
-                    words_to_exclude or [],
-                    minimum_term_length,
-                )
-            )
-
-        # Avoid empty spoken forms.
-        return [x for x in spoken_forms if x]
-
     def create_spoken_forms_from_list(
         sources: list[str],
         words_to_exclude: Optional[list[str]] = None,
@@ -517,23 +610,7 @@ class Actions:
         generate_subsequences: bool = True,
     ) -> dict[str, Any]:
         """Create spoken forms for all sources in a map, doing conflict resolution"""
-        all_spoken_forms: defaultdict[str, list[SpeakableItem]] = defaultdict(list)
-
-        for name, value in sources.items():
-            spoken_forms = actions.user.create_spoken_forms(
-                name, words_to_exclude, minimum_term_length, generate_subsequences
-            )
-            for spoken_form in spoken_forms:
-                all_spoken_forms[spoken_form].append(SpeakableItem(name, value))
-
-        final_spoken_forms = {}
-        for spoken_form, spoken_form_sources in all_spoken_forms.items():
-            if len(spoken_form_sources) > 1:
-                final_spoken_forms[spoken_form] = min(
-                    spoken_form_sources,
-                    key=lambda speakable_item: len(speakable_item.name),
-                ).value
-            else:
-                final_spoken_forms[spoken_form] = spoken_form_sources[0].value
-
-        return final_spoken_forms
+        builder = SpokenFormsBuilder(
+            words_to_exclude, minimum_term_length, generate_subsequences
+        )
+        return builder.update(sources)
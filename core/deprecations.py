@@ -54,7 +54,9 @@ import os.path
 import warnings
 from typing import Optional
 
-from talon import Module, actions, settings, speech_system
+from talon import Module, actions, settings
+
+from .phrase_profiler.phrase_profiler import register_phrase_handler
 
 REPO_DIR = os.path.dirname(os.path.dirname(__file__))
 
@@ -113,7 +115,7 @@ def post_phrase(_ignored):
     notified_in_phrase = set()
 
 
-speech_system.register("post:phrase", post_phrase)
+register_phrase_handler("post:phrase", post_phrase)
 
 
 @mod.action_class
@@ -1,7 +1,10 @@
 from talon import Module, actions, settings
 
+from ..user_settings import update_csv_list
 from .edit_command_actions import EditAction, run_action_callback
 from .edit_command_modifiers import EditModifier, run_modifier_callback
+from .edit_movement import movement_report, record_keystrokes
+from .selection_delays import SELECTION_DELAYS_HEADERS, get_selection_delay
 
 mod = Module()
 
@@ -22,6 +25,23 @@ mod.setting(
     desc="Sleep required between line selections",
 )
 
+# Delays tried in order by the calibration, the first one that selects the
+# same text as a generous reference delay wins
+CALIBRATION_DELAYS = (0, 10, 25, 50, 75, 100)
+CALIBRATION_REFERENCE_DELAY = 150
+CALIBRATION_WORD_COUNT = 3
+
+
+def measure_word_selection(delay: int) -> int:
+    """Selects words to the left with the given delay and returns the length of the selection.
+    Collapses the selection back to the starting position afterwards."""
+    extend_words("wordLeft", CALIBRATION_WORD_COUNT, delay)
+    actions.sleep(f"{CALIBRATION_REFERENCE_DELAY}ms")
+    length = len(actions.edit.selected_text())
+    if length:
+        actions.edit.right()
+    return length
+
 
 def before_line_up():
     actions.edit.up()
@@ -47,15 +67,22 @@ def select_lines(action, direction, count):
     if direction == "lineUp":
         selection_callback = actions.edit.extend_line_up
         extend_line_callback = actions.edit.extend_line_start
+        key_direction = "up"
     else:
         selection_callback = actions.edit.extend_line_down
         extend_line_callback = actions.edit.extend_line_end
+        key_direction = "down"
 
-    selection_delay = f"{settings.get('user.edit_command_line_selection_delay')}ms"
+    delay = get_selection_delay("user.edit_command_line_selection_delay")
+    selection_delay = f"{delay}ms"
 
-    for i in range(1, count + 1):
-        selection_callback()
-        actions.sleep(selection_delay)
+    record_keystrokes(count + 1)
+    if delay == 0:
+        actions.user.cursor_keys(key_direction, count, True)
+    else:
+        for i in range(1, count + 1):
+            selection_callback()
+            actions.sleep(selection_delay)
 
     # ensure we take the start/end of the line too!
     extend_line_callback()
@@ -63,27 +90,46 @@ def select_lines(action, direction, count):
     run_action_callback(action)
 
 
-def select_words(action, direction, count):
+def extend_words(direction, count, delay):
     if direction == "wordLeft":
         selection_callback = actions.edit.extend_word_left
+        key_direction = "left"
     else:
         selection_callback = actions.edit.extend_word_right
+        key_direction = "right"
 
-    selection_delay = f"{settings.get('user.edit_command_word_selection_delay')}ms"
+    record_keystrokes(count)
+    if delay == 0:
+        actions.user.word_keys(key_direction, count, True)
+        return
+
+    selection_delay = f"{delay}ms"
     for i in range(1, count + 1):
         selection_callback()
         actions.sleep(selection_delay)
 
+
+def select_words(action, direction, count):
+    delay = get_selection_delay("user.edit_command_word_selection_delay")
+    extend_words(direction, count, delay)
     run_action_callback(action)
 
 
 def word_movement_handler(action, direction, count):
     if direction == "wordLeft":
         movement_callback = actions.edit.word_left
+        key_direction = "left"
     else:
         movement_callback = actions.edit.word_right
+        key_direction = "right"
+
+    delay = get_selection_delay("user.edit_command_word_selection_delay")
+    record_keystrokes(count)
+    if delay == 0:
+        actions.user.word_keys(key_direction, count, False)
+        return
 
-    selection_delay = f"{settings.get('user.edit_command_word_selection_delay')}ms"
+    selection_delay = f"{delay}ms"
     for i in range(1, count + 1):
         movement_callback()
         actions.sleep(selection_delay)
@@ -118,13 +164,17 @@ custom_callbacks = {
     ("select", "lineDown"): select_lines,
 }
 
+# Character movements that are repeated with a single key chord
+batched_movements = {
+    ("select", "left"): lambda count: actions.user.cursor_extend("left", count),
+    ("select", "right"): lambda count: actions.user.cursor_extend("right", count),
+}
+
 # In other cases there already is a "compound" talon action for a given action and modifier
 compound_actions = {
     # select
     ("select", "wordLeft"): actions.edit.extend_word_left,
     ("select", "wordRight"): actions.edit.extend_word_right,
-    ("select", "left"): actions.edit.extend_left,
-    ("select", "right"): actions.edit.extend_right,
     ("select", "word"): actions.edit.extend_word_right,
     # Go before
     ("goBefore", "line"): actions.edit.line_start,
@@ -178,14 +228,42 @@ class Actions:
         key = (action.type, modifier.type)
         count = modifier.count
 
-        if key in custom_callbacks:
-            custom_callbacks[key](action, modifier.type, count)
-            return
-
-        elif key in compound_actions:
-            for i in range(1, count + 1):
-                compound_actions[key]()
+        with movement_report(f"edit command {action.type} {modifier.type}"):
+            if key in custom_callbacks:
+                custom_callbacks[key](action, modifier.type, count)
+                return
+
+            elif key in batched_movements:
+                batched_movements[key](count)
+                return
+
+            elif key in compound_actions:
+                record_keystrokes(count)
+                for i in range(1, count + 1):
+                    compound_actions[key]()
+                return
+
+            run_modifier_callback(modifier)
+            run_action_callback(action)
+
+    def edit_command_calibrate_selection_delay():
+        """Learn the shortest word and line selection delay that works in the active application.
+        The cursor must be after at least a few words on the current line."""
+        app_name = actions.app.name()
+        expected = measure_word_selection(CALIBRATION_REFERENCE_DELAY)
+        if expected == 0:
+            actions.app.notify("Selection delay calibration needs words to the left")
             return
 
-        run_modifier_callback(modifier)
-        run_action_callback(action)
+        for delay in CALIBRATION_DELAYS:
+            if measure_word_selection(delay) == expected:
+                break
+        else:
+            delay = CALIBRATION_REFERENCE_DELAY
+
+        update_csv_list(
+            "edit_selection_delays.csv",
+            SELECTION_DELAYS_HEADERS,
+            {app_name: str(delay)},
+        )
+        actions.app.notify(f"Selection delay for {app_name}: {delay}ms")
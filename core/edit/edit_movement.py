@@ -0,0 +1,143 @@
+import re
+import time
+from contextlib import contextmanager
+from typing import Literal
+
+from talon import Module, actions, app, settings
+
+from .selection_delays import get_selection_delay
+
+mod = Module()
+
+mod.setting(
+    "edit_movement_word_jumps",
+    type=bool,
+    default=False,
+    desc="If true, moving left over whole words uses word jumps when that takes fewer keystrokes than moving by character. Only enable it for apps whose word jumps stop at every word boundary, eg. not with sub-word or camel case motion",
+)
+
+mod.setting(
+    "edit_movement_report",
+    type=bool,
+    default=False,
+    desc="If true, navigation commands log the number of movement keystrokes they sent and how long they took",
+)
+
+Direction = Literal["left", "right", "up", "down"]
+
+# Only spans of letters, digits and spaces are word jumped: with plain word motion,
+# word_left stops at the start of each word in those, but editors disagree for
+# underscores, punctuation and newlines. Sub-word motion, like camel case, also
+# stops inside words, which is why word jumps are opt in.
+# Moving right is never word jumped since platforms disagree on whether word_right
+# stops at the end of the current word or the start of the next one.
+RE_WORD_SPAN_LEFT = re.compile(r"[^\W_]+(?:[^\S\n]+[^\W_]+)*[^\S\n]*")
+RE_WORD = re.compile(r"[^\W_]+")
+
+# Running total of movement keystrokes, used by `movement_report`
+keystroke_count = 0
+
+
+def plan_movement(
+    direction: Direction, count: int, text: str = "", word_jumps: bool = False
+) -> tuple[str, int]:
+    """Returns the cheapest way to move <count> steps in <direction> as a tuple of
+    "char", "word" or "line" and the number of keystrokes needed. <text> is the text
+    from the cursor to the start (left) or end (right) of the line, if known. A
+    count covering all of <text> moves to the line boundary in one keystroke."""
+    if count <= 0:
+        return "char", 0
+    if direction not in ("left", "right") or count > len(text):
+        return "char", count
+    if count == len(text):
+        # Many editors send line_start to the first non-blank character instead
+        if count > 1 and "\n" not in text and not text[0].isspace():
+            return "line", 1
+        return "char", count
+    if word_jumps and direction == "left":
+        span = text[-count:]
+        if RE_WORD_SPAN_LEFT.fullmatch(span) and not RE_WORD.match(text[-count - 1]):
+            words = len(RE_WORD.findall(span))
+            if words < count:
+                return "word", words
+    return "char", count
+
+
+def record_keystrokes(n: int):
+    global keystroke_count
+    keystroke_count += n
+
+
+@contextmanager
+def movement_report(name: str):
+    """Logs the movement keystrokes and wall-clock time spent in the block"""
+    start_count = keystroke_count
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        if settings.get("user.edit_movement_report"):
+            elapsed = (time.perf_counter() - start_time) * 1000
+            print(
+                f"{name}: {keystroke_count - start_count} keystrokes in {elapsed:.1f}ms"
+            )
+
+
+def move(direction: Direction, count: int, text: str, extend: bool):
+    kind, keystrokes = plan_movement(
+        direction, count, text, settings.get("user.edit_movement_word_jumps")
+    )
+    if keystrokes == 0:
+        return
+    record_keystrokes(keystrokes)
+    if kind == "line":
+        if direction == "left":
+            callback = (
+                actions.edit.extend_line_start if extend else actions.edit.line_start
+            )
+        else:
+            callback = actions.edit.extend_line_end if extend else actions.edit.line_end
+        callback()
+    elif kind == "word" and extend:
+        # Back to back word selections need the same delay as edit commands
+        delay = get_selection_delay("user.edit_command_word_selection_delay")
+        if delay == 0:
+            actions.user.word_keys(direction, keystrokes, True)
+        else:
+            for _ in range(keystrokes):
+                actions.edit.extend_word_left()
+                actions.sleep(f"{delay}ms")
+    elif kind == "word":
+        for _ in range(keystrokes):
+            actions.edit.word_left()
+    else:
+        actions.user.cursor_keys(direction, keystrokes, extend)
+
+
+@mod.action_class
+class Actions:
+    def cursor_move(direction: str, count: int, text: str = ""):
+        """Move the cursor <count> characters or lines in <direction> (left, right, up or down).
+        <text> is the text from the cursor to the start or end of the line in <direction>, if known.
+        It lets the move use a line or word jump when that takes fewer keystrokes, so it must
+        run all the way to the line boundary, not stop at text the caller inserted."""
+        move(direction, count, text, False)
+
+    def cursor_extend(direction: str, count: int, text: str = ""):
+        """Extend the selection <count> characters or lines in <direction> (left, right, up or down).
+        See user.cursor_move for <text>."""
+        move(direction, count, text, True)
+
+    def cursor_keys(direction: str, count: int, extend: bool):
+        """Press the arrow key for <direction> <count> times as a single key chord, holding shift if <extend>.
+        Override this in apps where the arrow keys don't move the cursor."""
+        modifier = "shift-" if extend else ""
+        actions.key(f"{modifier}{direction}:{count}")
+
+    def word_keys(direction: str, count: int, extend: bool):
+        """Press the word jump key for <direction> (left or right) <count> times as a single key chord, holding shift if <extend>.
+        Override this in apps where the platform's word jump keys don't apply."""
+        modifier = "alt" if app.platform == "mac" else "ctrl"
+        if extend:
+            modifier += "-shift"
+        actions.key(f"{modifier}-{direction}:{count}")
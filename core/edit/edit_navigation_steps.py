@@ -2,7 +2,10 @@ from contextlib import suppress
 from dataclasses import dataclass
 from typing import Callable, Literal
 
-from talon import Module, actions, settings
+from talon import Module, actions
+
+from .edit_command import get_selection_delay
+from .edit_movement import movement_report, record_keystrokes
 
 
 @dataclass
@@ -34,30 +37,38 @@ def navigation_step(m) -> NavigationStep:
 class Actions:
     def perform_navigation_steps(steps: list[NavigationStep]):
         """Navigate by a series of steps"""
-        for step in steps:
-            match step.modifier:
-                case "wordLeft":
-                    repeat_action(actions.edit.word_left, step.count, True)
-                case "wordRight":
-                    repeat_action(actions.edit.word_right, step.count, True)
-                case "word":
-                    repeat_action(actions.edit.word_right, step.count, True)
-                case "left":
-                    repeat_action(actions.edit.left, step.count)
-                case "right":
-                    repeat_action(actions.edit.right, step.count)
-                case "lineUp":
-                    repeat_action(actions.edit.up, step.count)
-                case "lineDown":
-                    repeat_action(actions.edit.down, step.count)
+        with movement_report("navigation steps"):
+            for step in steps:
+                perform_navigation_step(step)
+
+
+def perform_navigation_step(step: NavigationStep):
+    match step.modifier:
+        case "wordLeft":
+            repeat_action(actions.edit.word_left, step.count, True)
+        case "wordRight":
+            repeat_action(actions.edit.word_right, step.count, True)
+        case "word":
+            repeat_action(actions.edit.word_right, step.count, True)
+        case "left":
+            actions.user.cursor_move("left", step.count)
+        case "right":
+            actions.user.cursor_move("right", step.count)
+        case "lineUp":
+            actions.user.cursor_move("up", step.count)
+        case "lineDown":
+            actions.user.cursor_move("down", step.count)
 
 
 def repeat_action(action: Callable, count: int, delay: bool = False):
     delay_string = None
 
     if delay:
-        delay_string = f"{settings.get('user.edit_command_word_selection_delay')}ms"
+        delay_ms = get_selection_delay("user.edit_command_word_selection_delay")
+        if delay_ms:
+            delay_string = f"{delay_ms}ms"
 
+    record_keystrokes(count)
     for _ in range(count):
         action()
 
@@ -0,0 +1,33 @@
+from talon import actions, settings
+
+from ..user_settings import track_csv_list
+
+# Per application selection delays in milliseconds, learned by the
+# "selection delay calibrate" command. Applications without an entry use the
+# edit_command selection delay settings; an entry of 0 issues multi-step
+# selections as one key chord.
+selection_delays: dict[str, int] = {}
+SELECTION_DELAYS_HEADERS = ("Delay", "App name")
+
+
+@track_csv_list(
+    "edit_selection_delays.csv", headers=SELECTION_DELAYS_HEADERS, default={}
+)
+def on_selection_delays(values):
+    global selection_delays
+
+    delays = {}
+    for app_name, delay in values.items():
+        try:
+            delays[app_name] = int(delay)
+        except ValueError:
+            print(f"edit_selection_delays.csv: Invalid delay for {app_name}: {delay}")
+    selection_delays = delays
+
+
+def get_selection_delay(setting_name: str) -> int:
+    """Returns the learned selection delay for the active application, falling back to <setting_name>"""
+    app_name = actions.app.name()
+    if app_name in selection_delays:
+        return selection_delays[app_name]
+    return settings.get(setting_name)
@@ -1,6 +1,12 @@
 import os
+from pathlib import Path
+from typing import Optional
 
-from talon import Context, Module, actions, app, clip, fs, imgui, ui
+from talon import Context, Module, actions, app, clip, imgui, settings, ui
+
+from ..settings_files import register_settings_file
+from ..user_settings import PRIVATE_DIR
+from .homophones_index import HomophoneIndex, load_homophones
 
 ########################################################################
 # global settings
@@ -12,6 +18,8 @@ from talon import Context, Module, actions, app, clip, fs, imgui, ui
 # https://github.com/pimentel/homophones
 cwd = os.path.dirname(os.path.realpath(__file__))
 homophones_file = os.path.join(cwd, "homophones.csv")
+# the parsed homophones, so they don't need parsing again at startup
+homophones_cache_file = PRIVATE_DIR / "homophones_cache.json"
 # if quick_replace, then when a word is selected and only one homophone exists,
 # replace it without bringing up the options
 quick_replace = True
@@ -26,36 +34,43 @@ mod.tag(
     "homophones_open",
     desc="Tag for enabling homophones commands when the associated gui is open",
 )
+mod.setting(
+    "homophones_suffixes",
+    type=str,
+    default="s,es,ed,ing",
+    desc="Comma separated suffixes. Words not in the homophones list show the homophones of the word without the suffix, with the suffix added.",
+)
 
 main_screen = ui.main_screen()
 
 
-def update_homophones(name, flags):
-    if name != homophones_file:
-        return
+homophone_groups: list[tuple[str, ...]] = []
+homophone_index: Optional[HomophoneIndex] = None
+
+
+def load_homophones_file(path: Path) -> tuple[list[str], list[tuple[str, ...]]]:
+    return load_homophones(path, homophones_cache_file)
+
 
-    phones = {}
-    canonical_list = []
-    with open(homophones_file) as f:
-        for line in f:
-            words = line.rstrip().split(",")
-            words = [x for x in words if x.strip() != ""]
-            canonical_list.append(words[0])
-            merged_words = set(words)
-            for word in words:
-                old_words = phones.get(word.lower(), [])
-                merged_words.update(old_words)
-            merged_words = sorted(merged_words)
-            for word in merged_words:
-                phones[word.lower()] = merged_words
-
-    global all_homophones
-    all_homophones = phones
+def update_homophones(homophones: tuple[list[str], list[tuple[str, ...]]]):
+    global homophone_groups, homophone_index
+    canonical_list, homophone_groups = homophones
+    # Built on first use
+    homophone_index = None
     ctx.lists["self.homophones_canonicals"] = canonical_list
 
 
-update_homophones(homophones_file, None)
-fs.watch(cwd, update_homophones)
+def get_homophone_index() -> HomophoneIndex:
+    global homophone_index
+    if homophone_index is None:
+        homophone_index = HomophoneIndex(homophone_groups)
+    homophone_index.set_suffixes(
+        suffix.strip() for suffix in settings.get("user.homophones_suffixes").split(",")
+    )
+    return homophone_index
+
+
+register_settings_file(Path(homophones_file), load_homophones_file, update_homophones)
 active_word_list = None
 is_selection = False
 
@@ -100,18 +115,10 @@ def raise_homophones(word_to_find_homophones_for, forced=False, selection=False)
 
     word_to_find_homophones_for = word_to_find_homophones_for.lower()
 
-    # We support plurals, but very naively. If we can't find your word but your word ends in an s, presume its plural
-    # and attempt to find the singular, then present the presumed plurals back. This could be improved!
-    if word_to_find_homophones_for in all_homophones:
-        valid_homophones = all_homophones[word_to_find_homophones_for]
-    elif (
-        word_to_find_homophones_for.endswith("s")
-        and word_to_find_homophones_for[:-1] in all_homophones
-    ):
-        valid_homophones = map(
-            lambda w: w + "s", all_homophones[word_to_find_homophones_for[:-1]]
-        )
-    else:
+    # If we can't find your word but it is a known word plus one of the suffixes, eg a
+    # plural, present the homophones of the known word with the suffix added back.
+    valid_homophones = get_homophone_index().get(word_to_find_homophones_for)
+    if valid_homophones is None:
         app.notify(
             "homophones.py", f'"{word_to_find_homophones_for}" not in homophones list'
         )
@@ -222,10 +229,7 @@ class Actions:
 
     def homophones_get(word: str) -> [str] or None:
         """Get homophones for the given word"""
-        word = word.lower()
-        if word in all_homophones:
-            return all_homophones[word]
-        return None
+        return get_homophone_index().get(word, use_suffixes=False)
 
 
 ctx_homophones_open = Context()
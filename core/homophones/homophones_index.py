@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+class HomophoneIndex:
+    """Homophone groups, each stored once as a tuple, and the group of every
+    word. Words that are a group word plus a suffix are found through a
+    reverse map built from the suffix rules."""
+
+    def __init__(self, groups: list[tuple[str, ...]]):
+        self.groups = groups
+        self.group_ids: dict[str, int] = {
+            word.lower(): group_id
+            for group_id, group in enumerate(groups)
+            for word in group
+        }
+        self.suffixes: tuple[str, ...] = ()
+        # Inflected word -> (group id, suffix)
+        self.inflections: dict[str, tuple[int, str]] = {}
+
+    def set_suffixes(self, suffixes: Iterable[str]):
+        """Builds the reverse map for the suffix rules, if they changed"""
+        suffixes = tuple(suffix for suffix in suffixes if suffix)
+        if suffixes == self.suffixes:
+            return
+        self.suffixes = suffixes
+        self.inflections = {}
+        for suffix in suffixes:
+            for word, group_id in self.group_ids.items():
+                inflected = inflect(word, suffix)
+                if inflected not in self.group_ids:
+                    self.inflections.setdefault(inflected, (group_id, suffix))
+
+    def get(self, word: str, use_suffixes: bool = True) -> Optional[list[str]]:
+        """Returns the homophones of <word>, including itself, or None"""
+        word = word.lower()
+        group_id = self.group_ids.get(word)
+        if group_id is not None:
+            return list(self.groups[group_id])
+
+        if use_suffixes and word in self.inflections:
+            group_id, suffix = self.inflections[word]
+            return [inflect(homophone, suffix) for homophone in self.groups[group_id]]
+
+        return None
+
+
+def inflect(word: str, suffix: str) -> str:
+    """Adds <suffix> to <word>, dropping a silent e before a vowel, e.g. bare -> bared"""
+    if suffix[0] in "ei" and word.endswith("e"):
+        return word[:-1] + suffix
+    return word + suffix
+
+
+def parse_homophones(lines: Iterable[str]) -> tuple[list[str], list[tuple[str, ...]]]:
+    """Parses lines of comma separated homophones. Returns the first word of
+    each line, and the groups of homophones with lines sharing a word merged."""
+    canonicals = []
+    group_of: dict[str, int] = {}
+    members: list[Optional[set[str]]] = []
+
+    for line in lines:
+        words = [x for x in line.rstrip().split(",") if x.strip() != ""]
+        if not words:
+            continue
+        canonicals.append(words[0])
+
+        merged = set(words)
+        for group_id in {group_of.get(word.lower()) for word in words} - {None}:
+            merged.update(members[group_id])
+            members[group_id] = None
+
+        group_id = len(members)
+        members.append(merged)
+        for word in merged:
+            group_of[word.lower()] = group_id
+
+    groups = [tuple(sorted(words)) for words in members if words is not None]
+    return canonicals, groups
+
+
+def load_homophones(
+    path: Path, cache_path: Path
+) -> tuple[list[str], list[tuple[str, ...]]]:
+    """Returns the canonical words and homophone groups of the csv at <path>,
+    from <cache_path> if it was written for the current version of the file"""
+    stat = path.stat()
+    source = [stat.st_mtime_ns, stat.st_size]
+
+    try:
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+        if cache["source"] == source:
+            return cache["canonicals"], [tuple(group) for group in cache["groups"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    with open(path, encoding="utf-8") as f:
+        canonicals, groups = parse_homophones(f)
+
+    try:
+        cache_path.write_text(
+            json.dumps({"source": source, "canonicals": canonicals, "groups": groups}),
+            encoding="utf-8",
+        )
+    except OSError as e:
+        print(f"Failed to cache homophones in {cache_path}: {e}")
+
+    return canonicals, groups
@@ -24,6 +24,11 @@ numbers_map.update(teens_map)
 numbers_map.update(tens_map)
 numbers_map.update(scales_map)
 
+# Number of digits in the value of each scale word. A scale word absorbs up to
+# one digit fewer from the numbers after it, eg. "thousand" absorbs "twenty
+# three" but not "two three four five".
+scale_digits = {scale: len(str(value)) for scale, value in scales_map.items()}
+
 
 def get_spoken_form_under_one_hundred(
     start,
@@ -71,10 +76,59 @@ def get_spoken_form_under_one_hundred(
 
 def parse_number(l: list[str]) -> str:
     """Parses a list of words into a number/digit string."""
-    l = list(scan_small_numbers(l))
-    for scale in scales:
-        l = parse_scale(scale, l)
-    return "".join(str(n) for n in l)
+    # Scale words waiting for the numbers after them, as (scale, multiplier,
+    # numbers before the scale word). Their scales decrease towards the top.
+    pending: list[tuple[str, int, list[int]]] = []
+    numbers: list[int] = []
+    for n in scan_small_numbers(l):
+        if isinstance(n, int):
+            numbers.append(n)
+            continue
+
+        # Smaller scales and an earlier occurrence of this one can't absorb
+        # numbers past this scale word, so they are complete.
+        while pending and scales_map[pending[-1][0]] <= scales_map[n]:
+            numbers = apply_scale(*pending.pop(), numbers)
+
+        # A scale word right after a larger one has no multiplier, so
+        # "thousand hundred" is 1,100 but "hundred thousand" is 100,000.
+        multiplier = 1  # default multiplier
+        if numbers and numbers[-1] != 0:
+            multiplier = numbers.pop()
+        pending.append((n, multiplier, numbers))
+        numbers = []
+
+    while pending:
+        numbers = apply_scale(*pending.pop(), numbers)
+    return "".join(str(n) for n in numbers)
+
+
+def apply_scale(
+    scale: str, multiplier: int, before: list[int], after: list[int]
+) -> list[int]:
+    """Computes <multiplier> <scale> <remainder>, where the remainder is taken
+    from the start of <after>, the numbers following the scale word. For
+    example, [1, 26] makes "1 thousand" 1,126. We assume any smaller scales in
+    <after> have already been applied.
+
+    Returns <before> with the result and the numbers left in <after> appended.
+    This gives the same results as applying each scale to the whole phrase in
+    turn, from "hundred" up, but in a single pass over the words.
+    """
+    digits = scale_digits[scale]
+    remainder = ""
+    i = 0
+    # Take numbers from `after` until we fill up the desired number of digits.
+    while i < len(after):
+        next = remainder + str(after[i])
+        if len(next) >= digits:
+            break
+        remainder = next
+        i += 1
+
+    before.append(multiplier * scales_map[scale] + (int(remainder) if remainder else 0))
+    before.extend(after[i:])
+    return before
 
 
 def scan_small_numbers(l: list[str]) -> Iterator[Union[str, int]]:
@@ -103,82 +157,10 @@ def scan_small_numbers(l: list[str]) -> Iterator[Union[str, int]]:
             yield n
 
 
-def parse_scale(scale: str, l: list[Union[str, int]]) -> list[Union[str, int]]:
-    """Parses a list of mixed numbers & strings for occurrences of the following
-    pattern:
-
-        <multiplier> <scale> <remainder>
-
-    where <scale> is a scale word like "hundred", "thousand", "million", etc and
-    multiplier and remainder are numbers or strings of numbers of the
-    appropriate size. For example:
-
-        parse_scale("hundred", [1, "hundred", 2]) -> [102]
-        parse_scale("thousand", [12, "thousand", 3, 45]) -> [12345]
-
-    We assume that all scales of lower magnitude have already been parsed; don't
-    call parse_scale("thousand") until you've called parse_scale("hundred").
-    """
-    scale_value = scales_map[scale]
-    scale_digits = len(str(scale_value))
-
-    # Split the list on the desired scale word, then parse from left to right.
-    left, *splits = split_list(scale, l)
-    for right in splits:
-        # (1) Figure out the multiplier by looking to the left of the scale
-        # word. We ignore non-integers because they are scale words that we
-        # haven't processed yet; this strategy means that "thousand hundred"
-        # gets parsed as 1,100 instead of 100,000, but "hundred thousand" is
-        # parsed correctly as 100,000.
-        before = 1  # default multiplier
-        if left and isinstance(left[-1], int) and left[-1] != 0:
-            before = left.pop()
-
-        # (2) Absorb numbers to the right, eg. in [1, "thousand", 1, 26], "1
-        # thousand" absorbs ["1", "26"] to make 1,126. We pull numbers off
-        # `right` until we fill up the desired number of digits.
-        after = ""
-        while right and isinstance(right[0], int):
-            next = after + str(right[0])
-            if len(next) >= scale_digits:
-                break
-            after = next
-            right.pop(0)
-        after = int(after) if after else 0
-
-        # (3) Push the parsed number into place, append whatever was left
-        # unparsed, and continue.
-        left.append(before * scale_value + after)
-        left.extend(right)
-
-    return left
-
-
-def split_list(value, l: list) -> Iterator:
-    """Splits a list by occurrences of a given value."""
-    start = 0
-    while True:
-        try:
-            i = l.index(value, start)
-        except ValueError:
-            break
-        yield l[start:i]
-        start = i + 1
-    yield l[start:]
-
-
 # # ---------- TESTS (uncomment to run) ----------
 # def test_number(expected, string):
 #     print('testing:', string)
-#     l = list(scan_small_numbers(string.split()))
-#     print("  scan --->", l)
-#     for scale in scales:
-#         old = l
-#         l = parse_scale(scale, l)
-#         if scale in old: print("  parse -->", l)
-#         else: assert old == l, "parse_scale should do nothing if the scale does not occur in the list"
-#     result = "".join(str(n) for n in l)
-#     assert result == parse_number(string.split())
+#     result = parse_number(string.split())
 #     assert str(expected) == result, f"parsing {string!r}, expected {expected}, got {result}"
 
 # test_number(105000, "one hundred and five thousand")
@@ -0,0 +1,168 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from talon import Module, actions, imgui, speech_system
+
+mod = Module()
+
+# Number of recent samples the percentiles are computed over
+WINDOW_SIZE = 200
+STAGES = ("pre:phrase", "phrase", "post:phrase")
+PERCENTILES = (50, 95, 99)
+
+
+class RollingTimings:
+    """The last WINDOW_SIZE durations in milliseconds, with percentiles over them"""
+
+    def __init__(self):
+        self.samples: deque[float] = deque(maxlen=WINDOW_SIZE)
+        self.sorted: Optional[list[float]] = None
+
+    def add(self, duration: float):
+        self.samples.append(duration)
+        self.sorted = None
+
+    def percentile(self, p: int) -> float:
+        if self.sorted is None:
+            self.sorted = sorted(self.samples)
+        if not self.sorted:
+            return 0.0
+        # Nearest rank: the smallest sample with at least p% of samples at or
+        # below it
+        rank = -(-len(self.sorted) * p // 100)
+        return self.sorted[max(rank, 1) - 1]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+@dataclass
+class PhraseTiming:
+    """perf_counter timestamps of one phrase as it passes through the stages"""
+
+    phrase: Any
+    rule: str
+    speech_end: Optional[float]
+    stage_start: dict[str, float] = field(default_factory=dict)
+    stage_end: dict[str, float] = field(default_factory=dict)
+
+
+current_phrase: Optional[PhraseTiming] = None
+rule_timings: dict[str, RollingTimings] = {}
+stage_timings: dict[str, RollingTimings] = {stage: RollingTimings() for stage in STAGES}
+handler_timings: dict[str, RollingTimings] = {}
+
+
+def phrase_rule(phrase: Any) -> str:
+    """Names the command rules a phrase matched, falling back to its words"""
+    try:
+        names = [capture._name for capture in phrase["parsed"]]
+    except (KeyError, TypeError, AttributeError):
+        names = []
+    if names:
+        return " ".join(names)
+    return " ".join(phrase.get("phrase") or [])
+
+
+def get_phrase_timing(phrase: Any) -> PhraseTiming:
+    global current_phrase
+    if current_phrase is None or current_phrase.phrase is not phrase:
+        finish_phrase()
+        words = phrase.get("phrase") or []
+        # NB: mimic() and Dragon don't have word timestamps.
+        speech_end = getattr(words[-1], "end", None) if words else None
+        current_phrase = PhraseTiming(phrase, phrase_rule(phrase), speech_end)
+    return current_phrase
+
+
+def finish_phrase():
+    """Records the timings of the current phrase. Talon doesn't tell handlers
+    which of them runs last, so this happens when the next phrase starts."""
+    global current_phrase
+    timing = current_phrase
+    if timing is None or not timing.stage_start:
+        return
+    current_phrase = None
+
+    for stage in STAGES:
+        if stage in timing.stage_start:
+            stage_timings[stage].add(
+                (timing.stage_end[stage] - timing.stage_start[stage]) * 1000
+            )
+    start = min(timing.stage_start.values())
+    if timing.speech_end is not None:
+        start = min(start, timing.speech_end)
+    total = (max(timing.stage_end.values()) - start) * 1000
+    rule_timings.setdefault(timing.rule, RollingTimings()).add(total)
+
+
+def register_phrase_handler(topic: str, handler: Callable[[Any], None]) -> Callable:
+    """Registers <handler> with speech_system for <topic> (one of pre:phrase,
+    phrase or post:phrase), recording how long it and the phrase take.
+    Returns the registered wrapper, for use with speech_system.unregister."""
+    name = f"{handler.__module__}.{handler.__qualname__} ({topic})"
+    timings = handler_timings.setdefault(name, RollingTimings())
+
+    def wrapper(phrase):
+        start = time.perf_counter()
+        try:
+            return handler(phrase)
+        finally:
+            end = time.perf_counter()
+            timings.add((end - start) * 1000)
+            timing = get_phrase_timing(phrase)
+            timing.stage_start.setdefault(topic, start)
+            timing.stage_end[topic] = end
+
+    speech_system.register(topic, wrapper)
+    return wrapper
+
+
+def gui_timings(gui: imgui.GUI, title: str, timings: dict[str, RollingTimings]):
+    gui.text(title)
+    gui.line()
+    rows = sorted(
+        timings.items(), key=lambda item: item[1].percentile(95), reverse=True
+    )
+    for name, rolling in rows:
+        if not rolling:
+            continue
+        percentiles = " ".join(f"p{p} {rolling.percentile(p):.1f}" for p in PERCENTILES)
+        gui.text(f"{percentiles} ms  n={len(rolling)}  {name}")
+    gui.spacer()
+
+
+@imgui.open(y=0)
+def gui(gui: imgui.GUI):
+    gui_timings(
+        gui, "Phrase latency by rule (end of speech to last handler)", rule_timings
+    )
+    gui_timings(gui, "Phrase stages", stage_timings)
+    gui_timings(gui, "Phrase handlers", handler_timings)
+    if gui.button("Phrase profiler close"):
+        actions.user.phrase_profiler_hide()
+
+
+@mod.action_class
+class Actions:
+    def phrase_profiler_toggle():
+        """Toggles the phrase latency panel"""
+        if gui.showing:
+            gui.hide()
+        else:
+            gui.show()
+
+    def phrase_profiler_hide():
+        """Hides the phrase latency panel"""
+        gui.hide()
+
+    def phrase_profiler_reset():
+        """Clears the recorded phrase latencies"""
+        global current_phrase
+        current_phrase = None
+        rule_timings.clear()
+        for timings in (*stage_timings.values(), *handler_timings.values()):
+            timings.samples.clear()
+            timings.sorted = None
@@ -0,0 +1,164 @@
+"""
+Loads settings files off the main thread. Each registered file is watched with
+resource.watch, which Talon removes when the registering module reloads. Every
+file that changes within BATCH_DELAY is parsed in parallel on worker threads.
+Then the callbacks for all of them run together on the main thread.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from talon import Module, cron, resource
+
+mod = Module()
+
+# Changes closer together than this are loaded in one batch, which also groups
+# all the files registered while Talon imports the user scripts
+BATCH_DELAY = "50ms"
+PARSE_WORKERS = 4
+
+# Returns None when there is nothing to update, e.g. the content is unchanged
+ParseT = Callable[[Path], Optional[Any]]
+ApplyT = Callable[[Any], None]
+
+
+@dataclass
+class SettingsFile:
+    path: Path
+    # Runs on a worker thread, so must not use Talon APIs
+    parse: ParseT
+    # Runs on the main thread with the result of parse
+    apply: ApplyT
+
+    @property
+    def owner(self) -> str:
+        return f"{self.apply.__module__}.{self.apply.__qualname__}"
+
+    @property
+    def name(self) -> str:
+        return f"{self.path.name} ({self.owner})"
+
+
+@dataclass
+class LoadTiming:
+    """Milliseconds taken by the last load of a settings file"""
+
+    parse_ms: float = 0.0
+    apply_ms: float = 0.0
+    loads: int = 0
+
+
+# { (NORMALIZED PATH, OWNER): SETTINGS_FILE }, a file may be used by several
+# modules. A module registers again when it reloads, replacing its entry.
+settings_files: dict[tuple[str, str], SettingsFile] = {}
+load_timings: dict[str, LoadTiming] = {}
+
+# Entries whose files changed since the last batch started
+pending_keys: set[tuple[str, str]] = set()
+pending_lock = threading.Lock()
+batch_scheduled = False
+
+# Held while a batch is parsed, so a file is never parsed twice concurrently.
+# Each batch runs on its own threads, which exit when it is done: threads kept
+# in module state would be leaked every time this module reloads.
+batch_lock = threading.Lock()
+
+
+def normalize_path(path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def register_settings_file(path: Path, parse: ParseT, apply: ApplyT):
+    """Loads <path> now and whenever it changes: <parse> reads it on a worker
+    thread, and <apply> gets the result on the main thread"""
+    entry = SettingsFile(Path(path), parse, apply)
+    key = (normalize_path(path), entry.owner)
+    settings_files[key] = entry
+
+    # Only used as a trigger, the file is read again by parse
+    @resource.watch(str(path))
+    def on_change(f):
+        queue_load(key)
+
+    queue_load(key)
+
+
+def queue_load(key: tuple[str, str]):
+    global batch_scheduled
+    with pending_lock:
+        pending_keys.add(key)
+        if batch_scheduled:
+            return
+        batch_scheduled = True
+    cron.after(BATCH_DELAY, start_batch)
+
+
+def start_batch():
+    global batch_scheduled
+    with pending_lock:
+        keys = sorted(pending_keys)
+        pending_keys.clear()
+        batch_scheduled = False
+    entries = [settings_files[key] for key in keys if key in settings_files]
+    threading.Thread(target=load_batch, args=(entries,), daemon=True).start()
+
+
+def parse_file(entry: SettingsFile) -> tuple[SettingsFile, Optional[Any], float]:
+    start = time.perf_counter()
+    try:
+        result = entry.parse(entry.path)
+    except Exception:
+        logging.exception(f"Error loading {entry.path}")
+        result = None
+    return entry, result, (time.perf_counter() - start) * 1000
+
+
+def parse_batch(
+    entries: list[SettingsFile],
+) -> list[tuple[SettingsFile, Optional[Any], float]]:
+    with batch_lock:
+        with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as executor:
+            return list(executor.map(parse_file, entries))
+
+
+def load_batch(entries: list[SettingsFile]):
+    results = parse_batch(entries)
+    cron.after("0ms", lambda: apply_batch(results))
+
+
+def apply_batch(results: list[tuple[SettingsFile, Optional[Any], float]]):
+    for entry, result, parse_ms in results:
+        timing = load_timings.setdefault(entry.name, LoadTiming())
+        timing.parse_ms = parse_ms
+        timing.apply_ms = 0.0
+        timing.loads += 1
+        if result is None:
+            continue
+        start = time.perf_counter()
+        try:
+            entry.apply(result)
+        except Exception:
+            logging.exception(f"Error applying {entry.path}")
+        timing.apply_ms = (time.perf_counter() - start) * 1000
+
+
+@mod.action_class
+class Actions:
+    def settings_files_print_timings():
+        """Prints how long the last load of each settings file took"""
+        rows = sorted(
+            load_timings.items(),
+            key=lambda item: item[1].parse_ms + item[1].apply_ms,
+            reverse=True,
+        )
+        for name, timing in rows:
+            print(
+                f"parse {timing.parse_ms:.1f} ms  apply {timing.apply_ms:.1f} ms"
+                f"  loads {timing.loads}  {name}"
+            )
@@ -1,8 +1,9 @@
 from pathlib import Path
-from typing import Union
+from typing import Iterator, Union
 
-from talon import Context, Module, actions, app, fs, settings
+from talon import Context, Module, actions, app, cron, fs, settings, ui
 
+from ..modes import language_modes
 from ..modes.code_languages import code_languages
 from .snippet_types import (
     InsertionSnippet,
@@ -11,6 +12,7 @@ from .snippet_types import (
     SnippetLists,
     WrapperSnippet,
 )
+from .snippets_insert_raw_text import compile_snippet
 from .snippets_parser import create_snippets_from_file
 
 SNIPPETS_DIR = Path(__file__).parent / "snippets"
@@ -34,6 +36,23 @@ GLOBAL_ID = "_"
 # { SNIPPET_NAME: Snippet[] }
 snippets_map: dict[str, list[Snippet]] = {}
 
+# { (SNIPPET_NAME, LANGUAGE_ID): Snippet }, the snippet each language uses,
+# with the global fallback already applied
+preferred_snippets: dict[tuple[str, str], Snippet] = {}
+
+# (window key, code.language()), see get_language
+language_cache: tuple[tuple, Union[str, set[str]]] | None = None
+
+# { FILE_PATH: (MODIFICATION_TIME, Snippet[]) }, the parse cache
+snippet_files: dict[Path, tuple[float, list[Snippet]]] = {}
+
+# { LANGUAGE_ID: SnippetLists }, the lists of each language's own snippets
+language_to_lists: dict[str, SnippetLists] = {}
+
+# Paths changed since the last update, and the debounced update job
+pending_paths: set[Path] = set()
+update_job = None
+
 # { LANGUAGE_ID: SnippetLanguageState }
 languages_state_map: dict[str, SnippetLanguageState] = {
     GLOBAL_ID: SnippetLanguageState(Context(), SnippetLists())
@@ -70,8 +89,7 @@ class Actions:
 
     def get_snippet(name: str) -> Snippet:
         """Get snippet named <name> for the active language"""
-        snippets: list[Snippet] = actions.user.get_snippets(name)
-        return get_preferred_snippet(snippets)
+        return get_preferred_snippet(name)
 
     def get_insertion_snippets(name: str) -> list[InsertionSnippet]:
         """Get insertion snippets named <name>"""
@@ -102,25 +120,56 @@ class Actions:
         return to_wrapper_snippet(snippet, variable_name)
 
 
-def get_preferred_snippet(snippets: list[Snippet]) -> Snippet:
-    lang: Union[str, set[str]] = actions.code.language()
-    languages = [lang] if isinstance(lang, str) else lang
-
-    # First try to find a snippet matching the active language
-    for snippet in snippets:
-        if snippet.languages:
-            for snippet_lang in snippet.languages:
-                if snippet_lang in languages:
-                    return snippet
+def get_preferred_snippet(name: str) -> Snippet:
+    lang: Union[str, set[str]] = get_language()
 
-    # Then look for a global snippet
-    for snippet in snippets:
-        if not snippet.languages:
+    if isinstance(lang, str):
+        snippet = preferred_snippets.get((name, lang))
+        if snippet is not None:
+            return snippet
+        languages = [lang]
+    else:
+        languages = lang
+
+    # The language isn't indexed or the active language is a set of languages
+    for language in [*languages, GLOBAL_ID]:
+        snippet = preferred_snippets.get((name, language))
+        if snippet is not None:
             return snippet
 
+    if name not in snippets_map:
+        raise ValueError(f"Unknown snippet '{name}'")
     raise ValueError(f"Snippet not available for language '{lang}'")
 
 
+def get_language() -> Union[str, set[str]]:
+    """code.language memoized for the active window. It only changes along with
+    the window, its title (the active file) or the forced language mode."""
+    global language_cache
+    window = ui.active_window()
+    key = (window.id, window.title, language_modes.forced_language)
+    if language_cache is None or language_cache[0] != key:
+        language_cache = (key, actions.code.language())
+    return language_cache[1]
+
+
+def index_preferred_snippets(name: str, snippets: list[Snippet]):
+    """Resolves which of the snippets named <name> each language uses: the first
+    one for that language, otherwise the first global one"""
+    global_snippet = next((s for s in snippets if not s.languages), None)
+    language_snippets: dict[str, Snippet] = {}
+    for snippet in snippets:
+        for language in snippet.languages or []:
+            language_snippets.setdefault(language, snippet)
+
+    for language in {*languages_state_map, *language_snippets}:
+        snippet = language_snippets.get(language, global_snippet)
+        if snippet is None:
+            preferred_snippets.pop((name, language), None)
+        else:
+            preferred_snippets[(name, language)] = snippet
+
+
 def split_wrapper_snippet_name(name: str) -> tuple[str, str]:
     index = name.rindex(".")
     return name[:index], name[index + 1 :]
@@ -137,20 +186,63 @@ def to_wrapper_snippet(snippet: Snippet, variable_name) -> WrapperSnippet:
     )
 
 
-def update_snippets():
+def update_snippets(changed_paths: set[Path] | None = None):
+    """Reparses the snippet files that changed and updates the lists of the
+    affected languages. Looks for new and removed files too when <changed_paths>
+    is None or includes a directory."""
     global snippets_map
 
-    snippets = get_snippets_from_files()
+    changed_snippets = refresh_snippet_files(changed_paths)
+    if not changed_snippets:
+        return
+
+    names = {snippet.name for snippet in changed_snippets}
+    languages = {
+        language
+        for snippet in changed_snippets
+        for language in snippet.languages or [GLOBAL_ID]
+    }
+    name_to_snippets, changed_lists = index_snippets(names, languages)
+
+    updated_map = {
+        name: snippets for name, snippets in snippets_map.items() if name not in names
+    }
+    updated_map.update(name_to_snippets)
+    snippets_map = updated_map
+
+    for name in names:
+        index_preferred_snippets(name, snippets_map.get(name, []))
+
+    # Compile the bodies now so that raw text insertion only has to splice values
+    for snippet in changed_snippets:
+        compile_snippet(snippet.body)
+
+    language_to_lists.update(changed_lists)
+    for language in languages - changed_lists.keys():
+        language_to_lists.pop(language, None)
+
+    update_contexts(languages)
+
+
+def index_snippets(
+    names: set[str], languages: set[str]
+) -> tuple[dict[str, list[Snippet]], dict[str, SnippetLists]]:
+    """Maps the snippet names in <names> to their snippets and the languages in
+    <languages> to their phrase / name dicts, in a single pass over all snippets"""
     name_to_snippets: dict[str, list[Snippet]] = {}
-    language_to_lists: dict[str, SnippetLists] = {}
+    lists_by_language: dict[str, SnippetLists] = {}
 
-    for snippet in snippets:
+    for snippet in get_all_snippets():
         # Map snippet names to actual snippets
-        name_to_snippets.setdefault(snippet.name, []).append(snippet)
+        if snippet.name in names:
+            name_to_snippets.setdefault(snippet.name, []).append(snippet)
 
         # Map languages to phrase / name dicts
         for language in snippet.languages or [GLOBAL_ID]:
-            lists = language_to_lists.setdefault(language, SnippetLists())
+            if language not in languages:
+                continue
+
+            lists = lists_by_language.setdefault(language, SnippetLists())
 
             for phrase in snippet.phrases or []:
                 lists.insertion[phrase] = snippet.name
@@ -163,19 +255,24 @@ def update_snippets():
                 for phrase in var.wrapper_phrases or []:
                     lists.wrapper[phrase] = f"{snippet.name}.{var.name}"
 
-    snippets_map = name_to_snippets
-    update_contexts(language_to_lists)
+    return name_to_snippets, lists_by_language
 
 
-def update_contexts(language_to_lists: dict[str, SnippetLists]):
-    global_lists = language_to_lists[GLOBAL_ID] or SnippetLists()
+def update_contexts(languages: set[str]):
+    global_lists = language_to_lists.get(GLOBAL_ID) or SnippetLists()
 
-    for lang, lists in language_to_lists.items():
+    # Every language's lists include the global snippets
+    if GLOBAL_ID in languages:
+        languages = languages | language_to_lists.keys()
+
+    for lang in languages:
         if lang not in languages_state_map:
-            print(f"Found snippets for unknown language: {lang}")
-            actions.app.notify(f"Found snippets for unknown language: {lang}")
+            if lang in language_to_lists:
+                print(f"Found snippets for unknown language: {lang}")
+                actions.app.notify(f"Found snippets for unknown language: {lang}")
             continue
 
+        lists = language_to_lists.get(lang) or SnippetLists()
         state = languages_state_map[lang]
         insertion = {**global_lists.insertion, **lists.insertion}
         with_phrase = {**global_lists.with_phrase, **lists.with_phrase}
@@ -198,25 +295,95 @@ def update_contexts(language_to_lists: dict[str, SnippetLists]):
             state.ctx.lists.update(updated_lists)
 
 
-def get_snippets_from_files() -> list[Snippet]:
+def get_snippet_dirs() -> list[Path]:
     setting_dir = get_setting_dir()
-    result = []
+    return [SNIPPETS_DIR, setting_dir] if setting_dir else [SNIPPETS_DIR]
+
+
+def snippet_file_order(path: Path, dirs: list[Path]) -> tuple[int, Path]:
+    """Orders snippet files by directory, the community snippets first, then by path"""
+    for i, dir in enumerate(dirs):
+        if path.is_relative_to(dir):
+            return i, path
+    return len(dirs), path
+
+
+def get_all_snippets() -> Iterator[Snippet]:
+    for _mtime, snippets in snippet_files.values():
+        yield from snippets
+
+
+def refresh_snippet_files(changed_paths: set[Path] | None) -> list[Snippet]:
+    """Reparses the snippet files whose modification time changed, and forgets
+    removed ones. Returns the removed and added snippets of those files."""
+    if changed_paths is not None and all(
+        path.suffix == ".snippet" for path in changed_paths
+    ):
+        paths = changed_paths
+    else:
+        # A directory changed, or this is the first load: look for new files too
+        paths = set(snippet_files)
+        for dir in get_snippet_dirs():
+            paths.update(dir.glob("**/*.snippet"))
+
+    changed_snippets: list[Snippet] = []
+    dirs = get_snippet_dirs()
+    added_files = False
+
+    for path in sorted(paths, key=lambda path: snippet_file_order(path, dirs)):
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            mtime = None
+
+        cached = snippet_files.get(path)
+        if cached is not None and cached[0] == mtime:
+            continue
+
+        if cached is not None:
+            changed_snippets.extend(cached[1])
+
+        if mtime is None:
+            snippet_files.pop(path, None)
+        else:
+            # Changed files keep their place, so later files still win phrase conflicts
+            snippets = create_snippets_from_file(path)
+            added_files = added_files or path not in snippet_files
+            snippet_files[path] = (mtime, snippets)
+            changed_snippets.extend(snippets)
+
+    if added_files:
+        # Keep new files in their directory's place, not after every other file
+        ordered = sorted(
+            snippet_files.items(), key=lambda item: snippet_file_order(item[0], dirs)
+        )
+        snippet_files.clear()
+        snippet_files.update(ordered)
+
+    return changed_snippets
+
 
-    for file in SNIPPETS_DIR.glob("**/*.snippet"):
-        result.extend(create_snippets_from_file(file))
+def on_snippets_changed(path: str, _flags):
+    """Debounces file system events, since saving a file often fires several"""
+    global update_job
+    pending_paths.add(Path(path))
+    cron.cancel(update_job)
+    update_job = cron.after("150ms", update_pending_snippets)
 
-    if setting_dir:
-        for file in setting_dir.glob("**/*.snippet"):
-            result.extend(create_snippets_from_file(file))
 
-    return result
+def update_pending_snippets():
+    global update_job
+    update_job = None
+    paths = set(pending_paths)
+    pending_paths.clear()
+    update_snippets(paths)
 
 
 def on_ready():
-    fs.watch(SNIPPETS_DIR, lambda _path, _flags: update_snippets())
+    fs.watch(SNIPPETS_DIR, on_snippets_changed)
 
     if get_setting_dir():
-        fs.watch(get_setting_dir(), lambda _path, _flags: update_snippets())
+        fs.watch(get_setting_dir(), on_snippets_changed)
 
     update_snippets()
 
@@ -1,5 +1,7 @@
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Union
 
 from talon import Module, actions, settings
 
@@ -13,7 +15,14 @@ mod.setting(
 )
 
 INDENTATION = "    "
-RE_STOP = re.compile(r"\$(\d+|\w+)|\$\{(\d+|\w+)\}|\$\{(\d+|\w+):(.+)\}")
+# A stop number, or a variable name. "$2Actions" is stop 2 followed by "Actions".
+RE_NAME = re.compile(r"\d+|[A-Za-z_]\w*")
+
+# Variables replaced with their value when inserting a snippet
+VARIABLES: dict[str, Callable[[], str]] = {
+    "TM_SELECTED_TEXT": lambda: actions.edit.selected_text(),
+    "CLIPBOARD": lambda: actions.clip.text(),
+}
 
 
 @dataclass
@@ -25,6 +34,34 @@ class Stop:
     col: int
 
 
+@dataclass
+class TemplateStop:
+    """A tab stop, $1 or ${1} or ${1:default}. The default may contain stops too."""
+
+    name: str
+    default: list["TemplatePart"]
+
+
+@dataclass
+class TemplateVariable:
+    """A variable, $CLIPBOARD or ${CLIPBOARD}"""
+
+    name: str
+
+
+TemplatePart = Union[str, TemplateStop, TemplateVariable]
+
+
+@dataclass
+class SnippetTemplate:
+    """A snippet body split into literal text, stops and variables"""
+
+    parts: list[TemplatePart]
+    variables: set[str]
+    # The rendered text and first stop, for templates without variables
+    rendered: tuple[str, Stop | None] | None = field(default=None, repr=False)
+
+
 def insert_snippet_raw_text(body: str):
     """Insert snippet as raw text without editor support"""
     updated_snippet, stop = parse_snippet(body)
@@ -40,76 +77,175 @@ def insert_snippet_raw_text(body: str):
         left(stop.columns_left)
 
 
-def parse_snippet(body: str):
-    # Some IM services will send the message on a tab
-    body = re.sub(r"\t", INDENTATION, body)
-
-    # Replace variable with appropriate value/text
-    body = re.sub(r"\$TM_SELECTED_TEXT", lambda _: actions.edit.selected_text(), body)
-    body = re.sub(r"\$CLIPBOARD", lambda _: actions.clip.text(), body)
-
-    lines = body.splitlines()
-    stops: list[Stop] = []
-
-    for i, line in enumerate(lines):
-        match = RE_STOP.search(line)
+def parse_snippet(body: str) -> tuple[str, Stop | None]:
+    """Returns the text to insert for <body> and the stop to put the cursor at"""
+    template = compile_snippet(body)
 
-        while match:
-            stops.append(
-                Stop(
-                    name=match.group(1) or match.group(2) or match.group(3),
-                    rows_up=len(lines) - i - 1,
-                    columns_left=0,
-                    row=i,
-                    col=match.start(),
-                )
-            )
+    if template.rendered is not None:
+        return template.rendered
 
-            # Remove tab stops and variables.
-            stop_text = match.group(0)
-            default_value = match.group(4) or ""
-            line = line.replace(stop_text, default_value, 1)
+    # Only fetch the variables the snippet uses, getting the selected text is slow
+    values = {name: VARIABLES[name]() for name in template.variables}
+    rendered = render_template(template, values)
 
-            # Might have multiple stops on the same line
-            match = RE_STOP.search(line)
+    if not template.variables:
+        template.rendered = rendered
 
-        # Update existing line
-        lines[i] = line
+    return rendered
 
-    # Can't calculate column left until line text is fully updated
-    for stop in stops:
-        stop.columns_left = len(lines[stop.row]) - stop.col
 
-    updated_snippet = "\n".join(lines)
+@lru_cache(maxsize=1024)
+def compile_snippet(body: str) -> SnippetTemplate:
+    """Splits a snippet body into literal text, stops and variables. Cached, so
+    each body is only compiled once."""
+    # Some IM services will send the message on a tab
+    body = "\n".join(body.replace("\t", INDENTATION).splitlines())
+    variables: set[str] = set()
+    parts, _ = compile_parts(body, 0, False, variables)
+    return SnippetTemplate(parts, variables)
+
+
+def compile_parts(
+    body: str, pos: int, in_default: bool, variables: set[str]
+) -> tuple[list[TemplatePart], int | None]:
+    """Compiles <body> from <pos>, up to the closing brace if <in_default>. Returns
+    the parts and the position after them, or None if the closing brace is missing."""
+    parts: list[TemplatePart] = []
+    literal_start = pos
+
+    def add_literal(end: int):
+        if end > literal_start:
+            parts.append(body[literal_start:end])
+
+    while pos < len(body):
+        char = body[pos]
+
+        if in_default and char == "}":
+            add_literal(pos)
+            return parts, pos + 1
+
+        if char != "$":
+            pos += 1
+            continue
+
+        part, end = compile_dollar(body, pos, variables)
+        if part is None:
+            # Not a stop or variable, keep the dollar sign as text
+            pos += 1
+            continue
+
+        add_literal(pos)
+        parts.append(part)
+        pos = literal_start = end
+
+    if in_default:
+        return parts, None
+
+    add_literal(pos)
+    return parts, pos
+
+
+def compile_dollar(
+    body: str, pos: int, variables: set[str]
+) -> tuple[TemplatePart | None, int]:
+    """Compiles the stop or variable starting with the dollar sign at <pos>"""
+    match = RE_NAME.match(body, pos + 1)
+    if match:
+        return create_part(match.group(), [], variables), match.end()
+
+    if not body.startswith("{", pos + 1):
+        return None, pos
+
+    match = RE_NAME.match(body, pos + 2)
+    if not match or match.end() >= len(body):
+        return None, pos
+
+    name = match.group()
+    next_char = body[match.end()]
+
+    if next_char == "}":
+        return create_part(name, [], variables), match.end() + 1
+
+    if next_char == ":":
+        default, end = compile_parts(body, match.end() + 1, True, variables)
+        if end is not None:
+            return create_part(name, default, variables), end
+
+    return None, pos
+
+
+def create_part(
+    name: str, default: list[TemplatePart], variables: set[str]
+) -> TemplatePart:
+    if name in VARIABLES:
+        variables.add(name)
+        return TemplateVariable(name)
+    return TemplateStop(name, default)
+
+
+def render_template(
+    template: SnippetTemplate, values: dict[str, str]
+) -> tuple[str, Stop | None]:
+    """Splices the variable <values> and the stop defaults into <template>.
+    Returns the text and the stop to put the cursor at."""
+    chunks: list[str] = []
+    # (name, offset) of every stop, in order of appearance
+    stops: list[tuple[str, int]] = []
+    length = 0
+
+    def render(parts: list[TemplatePart]):
+        nonlocal length
+        for part in parts:
+            if isinstance(part, str):
+                text = part
+            elif isinstance(part, TemplateVariable):
+                text = values[part.name]
+            else:
+                stops.append((part.name, length))
+                render(part.default)
+                continue
+            chunks.append(text)
+            length += len(text)
+
+    render(template.parts)
+    text = "".join(chunks)
 
-    return updated_snippet, get_first_stop(stops)
+    if not stops:
+        return text, None
+
+    name, offset = min(stops, key=lambda stop: key_name(stop[0]))
+    line_start = text.rfind("\n", 0, offset) + 1
+    line_end = text.find("\n", offset)
+    if line_end == -1:
+        line_end = len(text)
+
+    stop = Stop(
+        name=name,
+        rows_up=text.count("\n", offset),
+        columns_left=line_end - offset,
+        row=text.count("\n", 0, offset),
+        col=offset - line_start,
+    )
+    if stop.rows_up == 0 and stop.columns_left == 0:
+        return text, None
+    return text, stop
 
 
 def up(n: int):
     """Move cursor up <n> rows"""
-    for _ in range(n):
-        actions.edit.up()
+    actions.user.cursor_move("up", n)
 
 
 def left(n: int):
     """Move cursor left <n> columns"""
-    for _ in range(n):
-        actions.edit.left()
+    # The snippet line isn't the whole editor line, which may start with text
+    # typed before the snippet, so no text is passed to user.cursor_move.
+    actions.user.cursor_move("left", n)
 
 
-def key(stop: Stop):
-    if stop.name == "0":
+def key_name(name: str) -> int:
+    if name == "0":
         return 1000
-    if stop.name.isdigit():
-        return int(stop.name)
+    if name.isdigit():
+        return int(name)
     return 999
-
-
-def get_first_stop(stops: list[Stop]):
-    if not stops:
-        return None
-    stops.sort(key=key)
-    stop = stops[0]
-    if stop.rows_up == 0 and stop.columns_left == 0:
-        return None
-    return stop
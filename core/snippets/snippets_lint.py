@@ -0,0 +1,207 @@
+"""
+Offline snippet linter. Parses every snippet file in parallel, outside of Talon,
+and prints the problems found as JSON:
+
+    python core/snippets/snippets_lint.py [--snippets-dir DIR] [--workers N]
+
+Reports parse errors and warnings, variables missing from snippet bodies,
+unknown languages and phrases used by more than one snippet in a language.
+Exits with status 1 if any errors were found.
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parents[2]
+SNIPPETS_DIR = Path(__file__).parent / "snippets"
+
+# Must match GLOBAL_ID in snippets.py
+GLOBAL_ID = "_"
+
+# Messages logged by snippets_parser look like "file.snippet:12 | message"
+RE_LOG_MESSAGE = re.compile(r"^(.*):(\d+) \| (.*)$", re.DOTALL)
+
+
+class ProblemCollector(logging.Handler):
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = path
+        self.problems: list[dict] = []
+
+    def emit(self, record: logging.LogRecord):
+        message = record.getMessage()
+        line = None
+        match = RE_LOG_MESSAGE.match(message)
+        if match:
+            line, message = int(match.group(2)), match.group(3)
+
+        if message.startswith("Variable '") and "missing in body" in message:
+            kind = "variable_mismatch"
+        elif record.levelno >= logging.ERROR:
+            kind = "parse_error"
+        else:
+            kind = "parse_warning"
+
+        self.problems.append(
+            {
+                "kind": kind,
+                "level": "error" if record.levelno >= logging.ERROR else "warning",
+                "file": str(self.path),
+                "line": line,
+                "message": message,
+            }
+        )
+
+
+def lint_file(path: Path) -> dict:
+    """Parses one snippet file, collecting the problems the parser logs"""
+    from core.snippets.snippets_parser import create_snippets_from_file
+
+    collector = ProblemCollector(path)
+    logger = logging.getLogger()
+    logger.addHandler(collector)
+    start = time.perf_counter()
+    try:
+        snippets = create_snippets_from_file(path)
+    except Exception as e:
+        snippets = []
+        collector.problems.append(
+            {
+                "kind": "parse_error",
+                "level": "error",
+                "file": str(path),
+                "line": None,
+                "message": f"{type(e).__name__}: {e}",
+            }
+        )
+    finally:
+        logger.removeHandler(collector)
+
+    return {
+        "file": str(path),
+        "ms": (time.perf_counter() - start) * 1000,
+        "problems": collector.problems,
+        "snippets": [
+            {
+                "name": snippet.name,
+                "languages": snippet.languages,
+                "phrases": snippet.phrases,
+            }
+            for snippet in snippets
+        ],
+    }
+
+
+def find_cross_file_problems(results: list[dict], language_ids: set[str]) -> list[dict]:
+    """Finds unknown languages, and phrases that resolve to more than one snippet
+    in a language once the global snippets are included"""
+    problems = []
+    # { LANGUAGE_ID: { PHRASE: { SNIPPET_NAME: FILE } } }
+    phrases: dict[str, dict[str, dict[str, str]]] = {}
+
+    for result in results:
+        for snippet in result["snippets"]:
+            for language in snippet["languages"] or [GLOBAL_ID]:
+                if language != GLOBAL_ID and language not in language_ids:
+                    problems.append(
+                        {
+                            "kind": "unknown_language",
+                            "level": "error",
+                            "file": result["file"],
+                            "line": None,
+                            "message": f"Snippet '{snippet['name']}' has unknown language '{language}'",
+                        }
+                    )
+                for phrase in snippet["phrases"] or []:
+                    names = phrases.setdefault(language, {}).setdefault(phrase, {})
+                    names.setdefault(snippet["name"], result["file"])
+
+    global_phrases = phrases.get(GLOBAL_ID, {})
+    for language, language_phrases in sorted(phrases.items()):
+        for phrase, names in sorted(language_phrases.items()):
+            if language != GLOBAL_ID:
+                names = {**global_phrases.get(phrase, {}), **names}
+            if len(names) > 1:
+                problems.append(
+                    {
+                        "kind": "duplicate_phrase",
+                        "level": "warning",
+                        "file": ", ".join(sorted(set(names.values()))),
+                        "line": None,
+                        "message": f"Phrase '{phrase}' in language '{language}' is used by snippets {sorted(names)}",
+                    }
+                )
+
+    return problems
+
+
+def lint(dirs: list[Path], workers: int | None) -> dict:
+    from core.modes.code_languages import code_languages
+
+    start = time.perf_counter()
+    files = sorted(file for dir in dirs for file in dir.glob("**/*.snippet"))
+
+    if workers == 1:
+        results = [lint_file(file) for file in files]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(lint_file, files, chunksize=4))
+
+    problems = [problem for result in results for problem in result["problems"]]
+    problems.extend(
+        find_cross_file_problems(results, {lang.id for lang in code_languages})
+    )
+
+    return {
+        "files": len(files),
+        "snippets": sum(len(result["snippets"]) for result in results),
+        "errors": sum(problem["level"] == "error" for problem in problems),
+        "warnings": sum(problem["level"] == "warning" for problem in problems),
+        "problems": problems,
+        "timings": {
+            "total_ms": (time.perf_counter() - start) * 1000,
+            "parse_ms": sum(result["ms"] for result in results),
+            "files_ms": {result["file"]: result["ms"] for result in results},
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lint the community snippets")
+    parser.add_argument(
+        "--snippets-dir",
+        type=Path,
+        help="Additional snippets directory, like the user.snippets_dir setting",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes, 1 to parse in this process",
+    )
+    args = parser.parse_args()
+
+    # Run against the Talon stubs used by the tests
+    sys.path[:0] = [str(REPO_DIR), str(REPO_DIR / "test" / "stubs")]
+    # Problems are reported in the JSON output instead
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger().handlers = [logging.NullHandler()]
+
+    dirs = [SNIPPETS_DIR]
+    if args.snippets_dir:
+        dirs.append(args.snippets_dir.resolve())
+
+    report = lint(dirs, args.workers)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    sys.exit(1 if report["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
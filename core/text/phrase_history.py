@@ -1,13 +1,164 @@
+import json
 import logging
+import re
+from collections import defaultdict, deque
+from typing import Iterator
 
-from talon import Module, actions, imgui
+from talon import Module, actions, app, imgui, settings
+
+from ..user_settings import PRIVATE_DIR
 
 mod = Module()
 
-# list of recent phrases, most recent first
-phrase_history = []
-phrase_history_length = 40
+phrase_history_default_size = 2000
+
+mod.setting(
+    "phrase_history_size",
+    type=int,
+    default=phrase_history_default_size,
+    desc="The number of recent phrases to keep in the phrase history",
+)
+
+mod.setting(
+    "phrase_history_log",
+    type=bool,
+    default=False,
+    desc="If true, phrases are also appended to private/phrase_history.jsonl and restored on startup",
+)
+
 phrase_history_display_length = 40
+phrase_history_search_limit = 40
+
+PHRASE_HISTORY_LOG = PRIVATE_DIR / "phrase_history.jsonl"
+
+RE_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> set[str]:
+    return set(RE_TOKEN.findall(text.casefold()))
+
+
+class PhraseHistory:
+    """Recent phrases, most recent first, in a ring buffer of fixed size. Keeps an
+    index from words to the phrases containing them for searching."""
+
+    def __init__(self, size: int):
+        # Phrase ids, most recent first. Ids are consecutive, so the ids in each
+        # index entry are ordered oldest first, like the right end of this deque,
+        # and the position of a phrase follows from its id.
+        self.ids: deque[int] = deque(maxlen=size)
+        self.texts: dict[int, str] = {}
+        self.tokens: dict[int, set[str]] = {}
+        self.index: defaultdict[str, deque[int]] = defaultdict(deque)
+        self.next_id = 0
+
+    @property
+    def size(self) -> int:
+        return self.ids.maxlen
+
+    def resize(self, size: int):
+        texts = list(self)[:size]
+        self.__init__(size)
+        for text in reversed(texts):
+            self.add(text)
+
+    def add(self, text: str):
+        if len(self.ids) == self.size:
+            self._unindex(self.ids[-1], oldest=True)
+        phrase_id = self.next_id
+        self.next_id += 1
+        self.ids.appendleft(phrase_id)
+        self.texts[phrase_id] = text
+        self.tokens[phrase_id] = tokenize(text)
+        for token in self.tokens[phrase_id]:
+            self.index[token].append(phrase_id)
+
+    def pop(self) -> str:
+        """Removes and returns the most recent phrase"""
+        phrase_id = self.ids.popleft()
+        text = self.texts[phrase_id]
+        self._unindex(phrase_id, oldest=False)
+        # Reuse the id, keeping the ids consecutive
+        self.next_id -= 1
+        return text
+
+    def _unindex(self, phrase_id: int, oldest: bool):
+        del self.texts[phrase_id]
+        for token in self.tokens.pop(phrase_id):
+            ids = self.index[token]
+            if oldest:
+                ids.popleft()
+            else:
+                ids.pop()
+            if not ids:
+                del self.index[token]
+
+    def search(self, query: str, limit: int) -> list[tuple[int, str]]:
+        """Returns up to <limit> (number, phrase) pairs for the most recent phrases
+        containing every word in <query>, where number is as for get_recent_phrase"""
+        tokens = tokenize(query)
+        if not tokens or any(token not in self.index for token in tokens):
+            return []
+        # Walk the rarest word's phrases, checking each for the other words
+        rarest = min(tokens, key=lambda token: len(self.index[token]))
+        matches = []
+        for phrase_id in reversed(self.index[rarest]):
+            if tokens <= self.tokens[phrase_id]:
+                matches.append((self.number(phrase_id), self.texts[phrase_id]))
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def number(self, phrase_id: int) -> int:
+        """The number of the phrase with <phrase_id>, as for get_recent_phrase"""
+        return self.next_id - phrase_id
+
+    def __getitem__(self, index: int) -> str:
+        return self.texts[self.ids[index]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.texts[phrase_id] for phrase_id in self.ids)
+
+
+# recent phrases, most recent first
+phrase_history = PhraseHistory(phrase_history_default_size)
+phrase_history_search_results: list[tuple[int, str]] = []
+
+
+def append_to_log(text: str):
+    with open(PHRASE_HISTORY_LOG, "a", encoding="utf-8") as f:
+        f.write(json.dumps(text) + "\n")
+
+
+def load_log(size: int):
+    """Restores the phrase history from the log, trimming the log once it has grown
+    well past the history size"""
+    if not PHRASE_HISTORY_LOG.is_file():
+        return
+    line_count = 0
+    lines = deque(maxlen=size)
+    with open(PHRASE_HISTORY_LOG, encoding="utf-8") as f:
+        for line in f:
+            line_count += 1
+            lines.append(line)
+    for line in lines:
+        try:
+            phrase_history.add(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    if line_count > 2 * size:
+        with open(PHRASE_HISTORY_LOG, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+def get_phrase_history() -> PhraseHistory:
+    size = settings.get("user.phrase_history_size")
+    if size != phrase_history.size:
+        phrase_history.resize(size)
+    return phrase_history
 
 
 @mod.action_class
@@ -33,36 +184,45 @@ class Actions:
         if not phrase_history:
             logging.warning("clear_last_phrase(): No last phrase to clear!")
             return
-        for _ in phrase_history.pop(0):
-            actions.key("backspace")
+        text = phrase_history.pop()
+        if text:
+            actions.key(f"backspace:{len(text)}")
 
     def select_last_phrase():
         """Selects the last phrase"""
         if not phrase_history:
             logging.warning("select_last_phrase(): No last phrase to select!")
             return
-        for _ in phrase_history[0]:
-            actions.edit.extend_left()
+        actions.user.cursor_extend("left", len(phrase_history[0]))
 
     def before_last_phrase():
         """Moves left before the last phrase"""
-        try:
-            for _ in phrase_history.pop(0):
-                actions.edit.left()
-        except IndexError:
+        if not phrase_history:
             logging.warning("before_last_phrase(): No last phrase to move before!")
+            return
+        actions.user.cursor_move("left", len(phrase_history.pop()))
 
     def add_phrase_to_history(text: str):
         """Adds a phrase to the phrase history"""
-        global phrase_history
-        phrase_history.insert(0, text)
-        phrase_history = phrase_history[:phrase_history_length]
+        get_phrase_history().add(text)
+        if settings.get("user.phrase_history_log"):
+            append_to_log(text)
+
+    def search_phrase_history(query: str):
+        """Shows the recent phrases containing every word in <query>"""
+        global phrase_history_search_results
+        phrase_history_search_results = phrase_history.search(
+            query, phrase_history_search_limit
+        )
+        gui.show()
 
     def toggle_phrase_history():
         """Toggles list of recent phrases"""
+        global phrase_history_search_results
         if gui.showing:
             gui.hide()
         else:
+            phrase_history_search_results = []
             gui.show()
 
     def phrase_history_hide():
@@ -77,9 +237,23 @@ def gui(gui: imgui.GUI):
     gui.text("Say 'recent repeat <number>' retype a phrase on this list.")
     gui.text("Say 'recent copy <number>' to copy a phrase from this list.")
     gui.line()
-    for index, text in enumerate(phrase_history[:phrase_history_display_length], 1):
-        gui.text(f"{index}: {text}")
+    if phrase_history_search_results:
+        for index, text in phrase_history_search_results:
+            gui.text(f"{index}: {text}")
+    else:
+        for index in range(min(len(phrase_history), phrase_history_display_length)):
+            gui.text(f"{index + 1}: {phrase_history[index]}")
 
     gui.spacer()
     if gui.button("Recent close"):
         actions.user.phrase_history_hide()
+
+
+def on_ready():
+    size = settings.get("user.phrase_history_size")
+    phrase_history.resize(size)
+    if settings.get("user.phrase_history_log"):
+        load_log(size)
+
+
+app.register("ready", on_ready)
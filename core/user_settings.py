@@ -1,8 +1,15 @@
 import csv
+import hashlib
+import io
+import os
+import shutil
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
 from pathlib import Path
-from typing import IO, Callable
+from typing import IO, Callable, Iterator, Optional
 
-from talon import resource
+from .settings_files import register_settings_file
 
 # NOTE: This method requires this module to be one folder below the top-level
 #   community folder.
@@ -61,15 +68,88 @@ def write_csv_defaults(
 ) -> None:
     if not path.is_file() and default is not None:
         with open(path, "w", encoding="utf-8", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(headers)
-            for key, value in default.items():
-                if key == value:
-                    writer.writerow([key])
-                elif is_spoken_form_first:
-                    writer.writerow([key, value])
-                else:
-                    writer.writerow([value, key])
+            write_csv_rows(file, headers, default, is_spoken_form_first)
+
+
+def write_csv_rows(
+    file: IO,
+    headers: tuple[str, str],
+    rows: dict[str, str],
+    is_spoken_form_first: bool = False,
+) -> None:
+    writer = csv.writer(file)
+    writer.writerow(headers)
+    for key, value in rows.items():
+        if key == value:
+            writer.writerow([key])
+        elif is_spoken_form_first:
+            writer.writerow([key, value])
+        else:
+            writer.writerow([value, key])
+
+
+@dataclass
+class CsvListDiff:
+    """Keys added, removed and changed in a csv list since its previous update.
+    <changed> holds the new values."""
+
+    added: dict[str, str] = field(default_factory=dict)
+    removed: dict[str, str] = field(default_factory=dict)
+    changed: dict[str, str] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_csv_lists(old: dict[str, str], new: dict[str, str]) -> CsvListDiff:
+    diff = CsvListDiff()
+    for key, value in new.items():
+        if key not in old:
+            diff.added[key] = value
+        elif old[key] != value:
+            diff.changed[key] = value
+    for key, value in old.items():
+        if key not in new:
+            diff.removed[key] = value
+    return diff
+
+
+# { (FILE NAME, HEADERS, IS_SPOKEN_FORM_FIRST): (CONTENT HASH, MAPPING) }, so a
+# file tracked by several modules is only parsed once per change
+parsed_csv_lists: dict[tuple, tuple[str, dict[str, str]]] = {}
+
+
+class TrackedCsvList:
+    """The content hash and mapping last read from a tracked csv, so updates
+    that leave the content unchanged (touches, saves without edits, sync
+    tools) can be skipped"""
+
+    def __init__(self, headers: tuple[str, str], is_spoken_form_first: bool = False):
+        self.headers = headers
+        self.is_spoken_form_first = is_spoken_form_first
+        self.digest: Optional[str] = None
+        self.mapping: dict[str, str] = {}
+
+    def update(self, f: IO) -> Optional[CsvListDiff]:
+        """Reads <f>, returning the difference with the previous content, or
+        None if the content is unchanged"""
+        content = f.read()
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if digest == self.digest:
+            return None
+
+        key = (f.name, self.headers, self.is_spoken_form_first)
+        cached = parsed_csv_lists.get(key)
+        if cached is not None and cached[0] == digest:
+            mapping = cached[1]
+        else:
+            f.seek(0)
+            mapping = read_csv_list(f, self.headers, self.is_spoken_form_first)
+            parsed_csv_lists[key] = (digest, mapping)
+
+        diff = diff_csv_lists(self.mapping, mapping)
+        self.digest, self.mapping = digest, mapping
+        return diff
 
 
 def track_csv_list(
@@ -78,30 +158,105 @@ def track_csv_list(
     default: dict[str, str] = None,
     is_spoken_form_first: bool = False,
     private: bool = False,
+    with_diff: bool = False,
 ) -> DecoratorT:
+    """Calls the decorated function with the mapping in the csv whenever its
+    content changes. With <with_diff>, it also gets a CsvListDiff of the
+    changes since the previous call."""
     assert filename.endswith(".csv")
     path = (PRIVATE_DIR / filename) if private else (SETTINGS_DIR / filename)
     write_csv_defaults(path, headers, default, is_spoken_form_first)
 
     def decorator(fn: CallbackT) -> CallbackT:
-        @resource.watch(str(path))
-        def on_update(f):
-            data = read_csv_list(f, headers, is_spoken_form_first)
-            fn(data)
+        tracked = TrackedCsvList(headers, is_spoken_form_first)
+
+        def parse(path: Path) -> Optional[tuple[dict[str, str], CsvListDiff]]:
+            with open(path, encoding="utf-8", newline="") as f:
+                diff = tracked.update(f)
+            if diff is None:
+                return None
+            # The cached mapping is shared, give each callback its own copy
+            return dict(tracked.mapping), diff
+
+        @wraps(fn)
+        def on_update(update: tuple[dict[str, str], CsvListDiff]):
+            values, diff = update
+            if with_diff:
+                fn(values, diff)
+            else:
+                fn(values)
+
+        register_settings_file(path, parse, on_update)
 
     return decorator
 
 
+@contextmanager
+def append_atomically(path: Path) -> Iterator[tuple[IO, bool]]:
+    """Appends to <path> through a copy that replaces it once complete, so
+    watchers reload the file once and never see a partial write. Yields the
+    copy, open for appending, and whether it needs a newline first."""
+    temp_path = path.with_name(f".{path.name}.tmp")
+    shutil.copyfile(path, temp_path)
+    try:
+        with open(temp_path, "rb") as file:
+            # Only the last byte is needed, not the whole file
+            if file.seek(0, os.SEEK_END) == 0:
+                needs_newline = False
+            else:
+                file.seek(-1, os.SEEK_END)
+                needs_newline = file.read(1) != b"\n"
+        with open(temp_path, "a", encoding="utf-8", newline="") as file:
+            yield file, needs_newline
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+@contextmanager
+def write_atomically(path: Path) -> Iterator[IO]:
+    """Writes <path> through a new file that replaces it once complete, so
+    watchers reload the file once and never see a partial write"""
+    temp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(temp_path, "w", encoding="utf-8", newline="") as file:
+            yield file
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def update_csv_list(
+    filename: str,
+    headers: tuple[str, str],
+    rows: dict[str, str],
+    is_spoken_form_first: bool = False,
+    private: bool = False,
+):
+    """Sets <rows> in the csv, replacing the existing rows for their keys, with
+    a single write"""
+    path = (PRIVATE_DIR / filename) if private else (SETTINGS_DIR / filename)
+    assert filename.endswith(".csv")
+
+    mapping = {}
+    if path.is_file():
+        with open(path, encoding="utf-8", newline="") as file:
+            mapping = read_csv_list(file, headers, is_spoken_form_first)
+    mapping.update(rows)
+
+    with write_atomically(path) as file:
+        write_csv_rows(file, headers, mapping, is_spoken_form_first)
+
+
 def append_to_csv(filename: str, rows: dict[str, str], private: bool = False):
+    """Appends <rows> to the csv in a single write, so it is only reloaded once
+    however many rows are added"""
     path = (PRIVATE_DIR / filename) if private else (SETTINGS_DIR / filename)
     assert filename.endswith(".csv")
 
-    with open(str(path)) as file:
-        line = None
-        for line in file:
-            pass
-        needs_newline = line is not None and not line.endswith("\n")
-    with open(path, "a", encoding="utf-8", newline="") as file:
+    with append_atomically(path) as (file, needs_newline):
         writer = csv.writer(file)
         if needs_newline:
             writer.writerow([])
@@ -123,10 +278,16 @@ def track_file(
         path.write_text(default)
 
     def decorator(fn: WatchCallbackType) -> WatchCallbackType:
-        @resource.watch(path)
-        def on_update(f):
+        def parse(path: Path) -> str:
+            return path.read_text(encoding="utf-8")
+
+        @wraps(fn)
+        def on_update(content: str):
+            f = io.StringIO(content)
+            f.name = str(path)
             fn(f)
 
-        return on_update
+        register_settings_file(path, parse, on_update)
+        return fn
 
     return decorator
@@ -1,12 +1,19 @@
 import logging
 import os
 import re
+from pathlib import Path
 from typing import Sequence, Union
 
 from talon import Context, Module, actions
 from talon.grammar import Phrase
 
-from ..user_settings import append_to_csv, track_csv_list
+from ..user_settings import (
+    CsvListDiff,
+    append_atomically,
+    append_to_csv,
+    read_csv_list,
+    track_csv_list,
+)
 
 mod = Module()
 ctx = Context()
@@ -46,6 +53,14 @@ _word_map_defaults.update({word.lower(): word for word in _capitalize_defaults})
 phrases_to_replace = {}
 
 
+# Key of the written form in a PhraseReplacer trie node, which is never a word
+_WRITTEN_FORM = None
+
+
+def normalize_spoken_form(spoken_form: str) -> str:
+    return " ".join(spoken_form.split())
+
+
 class PhraseReplacer:
     """Utility for replacing phrases by other phrases inside text or word lists.
 
@@ -56,50 +71,102 @@ class PhraseReplacer:
     """
 
     def __init__(self):
-        self.phrase_index = {}
+        self.phrase_trie = {}
+        # The spoken forms in phrase_dict by their words, as stored in the trie.
+        # Forms that only differ in spacing share a trie node.
+        self.spoken_forms: dict[str, set[str]] = {}
 
     def update(self, phrase_dict: dict[str, str]):
-        # Index phrases by first word, then number of subsequent words n_next
-        phrase_index = dict()
+        # Index phrases in a trie of nested dicts, one level per word
+        self.phrase_trie = {}
+        self.spoken_forms = {}
         for spoken_form, written_form in phrase_dict.items():
-            words = spoken_form.split()
-            if not words:
-                logging.warning(
-                    "Found empty spoken form for written form"
-                    f"{written_form}, ignored"
-                )
-                continue
-            first_word, n_next = words[0], len(words) - 1
-            phrase_index.setdefault(first_word, {}).setdefault(n_next, {})[
-                tuple(words[1:])
-            ] = written_form
-
-        # Sort n_next index so longer phrases have priority
-        self.phrase_index = {
-            first_word: sorted(same_first_word.items(), key=lambda x: -x[0])
-            for first_word, same_first_word in phrase_index.items()
-        }
+            self.spoken_forms.setdefault(normalize_spoken_form(spoken_form), set()).add(
+                spoken_form
+            )
+            self.add(spoken_form, written_form)
+
+    def apply_diff(self, diff: CsvListDiff, phrase_dict: dict[str, str]):
+        """Updates the trie in place with the entries changed in the csv.
+        <phrase_dict> is the whole csv after the change."""
+        changed = set()
+        for spoken_form in diff.removed:
+            key = normalize_spoken_form(spoken_form)
+            group = self.spoken_forms.get(key, set())
+            group.discard(spoken_form)
+            if not group:
+                self.spoken_forms.pop(key, None)
+            changed.add(key)
+        for spoken_form in {**diff.added, **diff.changed}:
+            key = normalize_spoken_form(spoken_form)
+            self.spoken_forms.setdefault(key, set()).add(spoken_form)
+            changed.add(key)
+
+        for key in changed:
+            group = self.spoken_forms.get(key)
+            if not group:
+                self.remove(key)
+            elif len(group) == 1:
+                self.add(key, phrase_dict[next(iter(group))])
+            else:
+                # Like update, the last of the forms in the csv wins
+                written_forms = [
+                    written_form
+                    for spoken_form, written_form in phrase_dict.items()
+                    if spoken_form in group
+                ]
+                self.add(key, written_forms[-1])
+
+    def add(self, spoken_form: str, written_form: str):
+        words = spoken_form.split()
+        if not words:
+            logging.warning(
+                "Found empty spoken form for written form" f"{written_form}, ignored"
+            )
+            return
+        node = self.phrase_trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node[_WRITTEN_FORM] = written_form
+
+    def remove(self, spoken_form: str):
+        # The path from the root to the phrase, to prune nodes left empty
+        path = [(None, self.phrase_trie)]
+        for word in spoken_form.split():
+            node = path[-1][1].get(word)
+            if node is None:
+                return
+            path.append((word, node))
+        path[-1][1].pop(_WRITTEN_FORM, None)
+        for (_, parent), (word, node) in zip(path[-2::-1], path[:0:-1]):
+            if node:
+                break
+            del parent[word]
 
     def replace(self, input_words: Sequence[str]) -> Sequence[str]:
-        input_words = tuple(input_words)  # tuple to ensure hashability of slices
         output_words = []
         first_word_i = 0
         while first_word_i < len(input_words):
-            first_word = input_words[first_word_i]
+            # Follow the trie as far as the input matches, remembering the
+            # longest phrase found on the way
+            node = self.phrase_trie.get(input_words[first_word_i])
             next_word_i = first_word_i + 1
-            # Could this word be the first of a phrase we should replace?
-            for n_next, phrases_n_next in self.phrase_index.get(first_word, []):
-                # Yes. Perhaps a phrase with n_next subsequent words?
-                continuation = input_words[next_word_i : next_word_i + n_next]
-                if continuation in phrases_n_next:
-                    # Found a match!
-                    output_words.append(phrases_n_next[continuation])
-                    first_word_i += 1 + n_next
+            match = None
+            while node is not None:
+                if _WRITTEN_FORM in node:
+                    match = (node[_WRITTEN_FORM], next_word_i)
+                if next_word_i == len(input_words):
                     break
-            else:
+                node = node.get(input_words[next_word_i])
+                next_word_i += 1
+
+            if match is None:
                 # No match, just add the word to the result
-                output_words.append(first_word)
+                output_words.append(input_words[first_word_i])
                 first_word_i += 1
+            else:
+                written_form, first_word_i = match
+                output_words.append(written_form)
         return output_words
 
     # Wrapper used for testing.
@@ -124,6 +191,16 @@ assert rep.replace_string("this is a test") == "it worked!"
 assert rep.replace_string("well this is a test really") == "well it worked! really"
 assert rep.replace_string("try this is too") == "try stopping early too"
 assert rep.replace_string("this is a tricky one") == "stopping early a tricky one"
+rep.apply_diff(
+    CsvListDiff(removed={"this is a test": "it worked!"}, changed={"that": "baz"}),
+    {"this": "foo", "that": "baz", "this is": "stopping early"},
+)
+assert rep.replace_string("this is a test") == "stopping early a test"
+assert rep.replace_string("that") == "baz"
+assert "a" not in rep.phrase_trie["this"]["is"]
+rep.update({"new york": "New York", "new  york": "new york"})
+rep.apply_diff(CsvListDiff(removed={"new  york": "new york"}), {"new york": "New York"})
+assert rep.replace_string("new york") == "New York"
 
 phrase_replacer = PhraseReplacer()
 
@@ -136,11 +213,12 @@ phrase_replacer = PhraseReplacer()
     "words_to_replace.csv",
     headers=("Replacement", "Original"),
     default=_word_map_defaults,
+    with_diff=True,
 )
-def on_word_map(values):
+def on_word_map(values, diff: CsvListDiff):
     global phrases_to_replace
     phrases_to_replace = values
-    phrase_replacer.update(values)
+    phrase_replacer.apply_diff(diff, values)
 
     # "dictate.word_map" is used by Talon's built-in default implementation of
     # `dictate.replace_words`, but supports only single-word replacements.
@@ -215,15 +293,22 @@ def _add_selection_to_file(
         actions.app.notify(f"Added to {file_name}: {new_entries}")
 
 
+# Characters that end or change the meaning of an unquoted spoken form in a
+# .talon-list line, and a leading "-" which would end its header instead
+RE_UNSAFE_SPOKEN_FORM = re.compile(r"""[:#'"]|^-""")
+
+
+def is_safe_spoken_form(spoken_form: str) -> bool:
+    """Whether <spoken_form> can be written to a .talon-list as is"""
+    return spoken_form.isprintable() and not RE_UNSAFE_SPOKEN_FORM.search(spoken_form)
+
+
 def append_to_vocabulary(rows: dict[str, str]):
-    vocabulary_file_path = actions.user.get_vocabulary_file_path()
-    with open(str(vocabulary_file_path)) as file:
-        line = None
-        for line in file:
-            pass
-        needs_newline = line is not None and not line.endswith("\n")
-
-    with open(vocabulary_file_path, "a", encoding="utf-8") as file:
+    write_vocabulary_entries(Path(actions.user.get_vocabulary_file_path()), rows)
+
+
+def write_vocabulary_entries(vocabulary_file_path: Path, rows: dict[str, str]):
+    with append_atomically(vocabulary_file_path) as (file, needs_newline):
         if needs_newline:
             file.write("\n")
         for key, value in rows.items():
@@ -270,6 +355,37 @@ class Actions:
             True,
         )
 
+    def import_vocabulary(path: str):
+        """Adds every word in a csv file to the vocabulary with a single write. The csv
+        has the same columns as the old additional_words.csv: "Word(s)" and
+        "Spoken Form (If Different)". Spoken forms already in the vocabulary are skipped,
+        as are ones that can't be written to a .talon-list, eg. containing ":".
+        """
+        with open(path, encoding="utf-8", newline="") as f:
+            entries = read_csv_list(f, ("Word(s)", "Spoken Form (If Different)"))
+        vocabulary = actions.user.talon_get_active_registry_list("user.vocabulary")
+        new_entries = {
+            spoken_form: written_form
+            for spoken_form, written_form in entries.items()
+            if spoken_form and spoken_form not in vocabulary
+        }
+        unsafe = [
+            spoken_form
+            for spoken_form in new_entries
+            if not is_safe_spoken_form(spoken_form)
+        ]
+        for spoken_form in unsafe:
+            del new_entries[spoken_form]
+        if unsafe:
+            print(f"Skipped spoken forms that can't be in a .talon-list: {unsafe}")
+
+        if new_entries:
+            append_to_vocabulary(new_entries)
+        message = f"Added {len(new_entries)} of {len(entries)} words to the vocabulary"
+        if unsafe:
+            message += f", skipped {len(unsafe)} that can't be in a .talon-list"
+        actions.app.notify(message)
+
     def check_vocabulary_for_selection():
         """Checks if the currently selected text is in the vocabulary."""
         text = actions.edit.selected_text().strip()
@@ -0,0 +1,238 @@
+"""
+Offline report of overlapping entries in the vocabulary, abbreviations and
+words to replace, outside of Talon:
+
+    python core/vocabulary/vocabulary_lint.py
+
+Reports spoken forms defined with the same written form in several lists
+(duplicates) or with different ones (conflicts), replacements that can never
+apply, and vocabulary whose written form is rewritten by words_to_replace.csv.
+Prints JSON, including an estimate of the spoken forms and words that could
+be removed from the grammar.
+"""
+
+import ast
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parents[2]
+VOCABULARY_LIST = Path(__file__).parent / "vocabulary.talon-list"
+
+# (file name in the settings dir, headers) of each csv, as read by track_csv_list
+CSV_LISTS = {
+    "additional_words.csv": ("Word(s)", "Spoken Form (If Different)"),
+    "abbreviations.csv": ("Abbreviation", "Spoken Form"),
+    "words_to_replace.csv": ("Replacement", "Original"),
+}
+
+
+def parse_talon_list_value(value: str) -> str:
+    value = value.strip()
+    if value[:1] in ("'", '"'):
+        return ast.literal_eval(value)
+    return value
+
+
+def read_talon_list(path: Path) -> tuple[dict[str, str], list[str]]:
+    """Returns the entries of a .talon-list file, and spoken forms that appear
+    more than once in it"""
+    entries = {}
+    repeated = []
+    with open(path, encoding="utf-8") as f:
+        lines = iter(f)
+        # Skip the header, which ends with a line containing a single dash
+        for line in lines:
+            if line.strip() == "-":
+                break
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            spoken_form, separator, written_form = line.partition(":")
+            spoken_form = parse_talon_list_value(spoken_form)
+            written_form = (
+                parse_talon_list_value(written_form) if separator else spoken_form
+            )
+            if spoken_form in entries:
+                repeated.append(spoken_form)
+            entries[spoken_form] = written_form
+    return entries, repeated
+
+
+def load_sources(settings_dir: Path) -> dict[str, dict[str, str]]:
+    """Returns the spoken form to written form map of every list that exists"""
+    from core.user_settings import read_csv_list
+
+    sources = {}
+    if VOCABULARY_LIST.is_file():
+        sources[VOCABULARY_LIST.name], _ = read_talon_list(VOCABULARY_LIST)
+    for file_name, headers in CSV_LISTS.items():
+        path = settings_dir / file_name
+        if path.is_file():
+            with open(path, encoding="utf-8", newline="") as f:
+                sources[file_name] = read_csv_list(f, headers)
+    return sources
+
+
+def problem(kind: str, spoken_form: str, message: str, sources: list[str]) -> dict:
+    return {
+        "kind": kind,
+        "spoken_form": spoken_form,
+        "sources": sources,
+        "message": message,
+    }
+
+
+def find_overlaps(sources: dict[str, dict[str, str]]) -> list[dict]:
+    """Finds spoken forms defined in more than one list"""
+    problems = []
+    # { SPOKEN_FORM: { SOURCE: WRITTEN_FORM } }
+    definitions: dict[str, dict[str, str]] = {}
+    for source, entries in sources.items():
+        for spoken_form, written_form in entries.items():
+            definitions.setdefault(spoken_form, {})[source] = written_form
+
+    for spoken_form, written_forms in sorted(definitions.items()):
+        if len(written_forms) < 2:
+            continue
+        if len(set(written_forms.values())) == 1:
+            problems.append(
+                problem(
+                    "duplicate",
+                    spoken_form,
+                    f"'{spoken_form}' is written as '{next(iter(written_forms.values()))}' in every list",
+                    sorted(written_forms),
+                )
+            )
+        else:
+            problems.append(
+                problem(
+                    "conflict",
+                    spoken_form,
+                    f"'{spoken_form}' is written as {written_forms}",
+                    sorted(written_forms),
+                )
+            )
+    return problems
+
+
+def find_unreachable_replacements(replacements: dict[str, str]) -> list[dict]:
+    """Finds words_to_replace entries that never change the dictated text"""
+    from core.vocabulary.vocabulary import PhraseReplacer
+
+    problems = []
+    replacer = PhraseReplacer()
+    replacer.update(replacements)
+    for spoken_form, written_form in sorted(replacements.items()):
+        words = spoken_form.split()
+        if spoken_form == written_form:
+            problems.append(
+                problem(
+                    "unreachable",
+                    spoken_form,
+                    f"'{spoken_form}' is replaced by itself",
+                    ["words_to_replace.csv"],
+                )
+            )
+        elif replacer.replace(words) != [written_form]:
+            problems.append(
+                problem(
+                    "unreachable",
+                    spoken_form,
+                    f"'{spoken_form}' is always replaced by another entry, e.g. one with the same words but different spacing",
+                    ["words_to_replace.csv"],
+                )
+            )
+    return problems
+
+
+def find_rewritten_vocabulary(
+    vocabulary: dict[str, str], replacements: dict[str, str]
+) -> list[dict]:
+    """Finds vocabulary whose written form is changed by words_to_replace"""
+    from core.vocabulary.vocabulary import PhraseReplacer
+
+    problems = []
+    replacer = PhraseReplacer()
+    replacer.update(replacements)
+    for spoken_form, written_form in sorted(vocabulary.items()):
+        words = written_form.split()
+        replaced = replacer.replace(words)
+        if replaced != words:
+            problems.append(
+                problem(
+                    "rewritten",
+                    spoken_form,
+                    f"'{spoken_form}' is written as '{written_form}' but words_to_replace.csv turns it into '{' '.join(replaced)}'",
+                    [VOCABULARY_LIST.name, "words_to_replace.csv"],
+                )
+            )
+    return problems
+
+
+def estimate_savings(problems: list[dict]) -> dict:
+    """Estimates the grammar that could be removed by deleting the redundant
+    entries: all but one copy of each duplicate, and unreachable replacements"""
+    spoken_forms = 0
+    words = 0
+    for p in problems:
+        if p["kind"] == "duplicate":
+            # Repeats within one list have a single source
+            copies = max(len(p["sources"]) - 1, 1)
+        elif p["kind"] == "unreachable":
+            copies = 1
+        else:
+            continue
+        spoken_forms += copies
+        words += copies * len(p["spoken_form"].split())
+    return {"spoken_forms": spoken_forms, "words": words}
+
+
+def lint(settings_dir: Path) -> dict:
+    start = time.perf_counter()
+    sources = load_sources(settings_dir)
+
+    problems = find_overlaps(sources)
+    if VOCABULARY_LIST.is_file():
+        _, repeated = read_talon_list(VOCABULARY_LIST)
+        problems.extend(
+            problem(
+                "duplicate",
+                spoken_form,
+                f"'{spoken_form}' appears more than once",
+                [VOCABULARY_LIST.name],
+            )
+            for spoken_form in repeated
+        )
+
+    replacements = sources.get("words_to_replace.csv", {})
+    problems.extend(find_unreachable_replacements(replacements))
+    problems.extend(
+        find_rewritten_vocabulary(sources.get(VOCABULARY_LIST.name, {}), replacements)
+    )
+
+    return {
+        "entries": {source: len(entries) for source, entries in sources.items()},
+        "counts": {
+            kind: sum(p["kind"] == kind for p in problems)
+            for kind in ("duplicate", "conflict", "unreachable", "rewritten")
+        },
+        "savings": estimate_savings(problems),
+        "problems": problems,
+        "ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def main():
+    # Run against the Talon stubs used by the tests
+    sys.path[:0] = [str(REPO_DIR), str(REPO_DIR / "test" / "stubs")]
+
+    report = lint(REPO_DIR / "settings")
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
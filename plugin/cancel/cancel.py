@@ -3,9 +3,11 @@
 
 import time
 
-from talon import Context, Module, actions, speech_system
+from talon import Context, Module, actions
 from talon.grammar import Phrase
 
+from ...core.phrase_profiler.phrase_profiler import register_phrase_handler
+
 # To change the phrase used to cancel commands, you must also adjust cancel.talon
 cancel_phrase = "cancel cancel".split()
 
@@ -70,4 +72,4 @@ def cancel_entire_phrase(phrase: Phrase):
         phrase["parsed"]._sequence = []
 
 
-speech_system.register("pre:phrase", pre_phrase)
+register_phrase_handler("pre:phrase", pre_phrase)
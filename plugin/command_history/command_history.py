@@ -1,17 +1,38 @@
+import time
+from collections import deque
 from typing import Optional
 
-from talon import Module, actions, imgui, settings, speech_system
+from talon import Module, actions, cron, imgui, settings
 
+from ...core.phrase_profiler.phrase_profiler import phrase_rule, register_phrase_handler
+from ...core.user_settings import PRIVATE_DIR
 from ..subtitles.on_phrase import skip_phrase
+from .command_history_log import CommandHistoryLog
 
 # We keep command_history_size lines of history, but by default display only
 # command_history_display of them.
 mod = Module()
 mod.setting("command_history_size", type=int, default=50)
 mod.setting("command_history_display", type=int, default=10)
+mod.setting(
+    "command_history_log",
+    type=bool,
+    default=False,
+    desc="If true, every command is also recorded in private/command_history.jsonl",
+)
+mod.setting(
+    "command_history_log_max_bytes",
+    type=int,
+    default=5_000_000,
+    desc="Size at which the command history log is rotated to command_history.1.jsonl",
+)
 
 hist_more: bool = False
-history: list[str] = []
+history: deque[str] = deque(maxlen=50)
+
+command_log = CommandHistoryLog(
+    PRIVATE_DIR / "command_history.jsonl", PRIVATE_DIR / "command_history.1.jsonl"
+)
 
 
 def on_phrase(j):
@@ -21,9 +42,40 @@ def on_phrase(j):
 
     words = j.get("phrase")
     text = actions.user.history_transform_phrase_text(words)
-    if text is not None:
-        history.append(text)
-        history = history[-settings.get("user.command_history_size") :]
+    if text is None:
+        return
+
+    size = settings.get("user.command_history_size")
+    if size != history.maxlen:
+        history = deque(history, maxlen=size)
+    history.append(text)
+
+    if settings.get("user.command_history_log"):
+        command_log.add(
+            {
+                "time": round(time.time(), 3),
+                "app": actions.app.name(),
+                "duration": phrase_duration(words),
+                "rule": phrase_rule(j),
+                "text": text,
+            }
+        )
+
+
+def phrase_duration(words) -> Optional[float]:
+    """Returns how long the phrase took to speak in seconds, if known"""
+    if not words:
+        return None
+    # NB: mimic() and Dragon don't have word timestamps.
+    start = getattr(words[0], "start", None)
+    end = getattr(words[-1], "end", None)
+    if start is None or end is None:
+        return None
+    return round(end - start, 3)
+
+
+def flush_log():
+    command_log.flush(settings.get("user.command_history_log_max_bytes"))
 
 
 # todo: dynamic rect?
@@ -33,9 +85,9 @@ def gui(gui: imgui.GUI):
     gui.text("Command History")
     gui.line()
     text = (
-        history[:]
+        list(history)
         if hist_more
-        else history[-settings.get("user.command_history_display") :]
+        else list(history)[-settings.get("user.command_history_display") :]
     )
     for line in text:
         gui.text(line)
@@ -45,7 +97,8 @@ def gui(gui: imgui.GUI):
         actions.user.history_disable()
 
 
-speech_system.register("phrase", on_phrase)
+register_phrase_handler("phrase", on_phrase)
+cron.interval("5s", flush_log)
 
 
 @mod.action_class
@@ -67,8 +120,7 @@ class Actions:
 
     def history_clear():
         """Clear the history"""
-        global history
-        history = []
+        history.clear()
 
     def history_more():
         """Show more history"""
@@ -88,3 +140,7 @@ class Actions:
     def history_transform_phrase_text(words: list[str]) -> Optional[str]:
         """Transforms phrase text for presentation in history. Return `None` to omit from history"""
         return " ".join(words) if words else None
+
+    def history_command_frequency(app_name: str = "", limit: int = 20) -> list:
+        """Returns the <limit> most frequently spoken commands, by the rules they matched, and their counts from the command history log, optionally only those spoken in <app_name>"""
+        return command_log.command_frequency(app_name or None).most_common(limit)
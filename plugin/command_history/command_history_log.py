@@ -0,0 +1,66 @@
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+def command_key(record: dict) -> str:
+    """The command a record counts towards: the rules it matched, or its text
+    for records logged before rules were recorded"""
+    return record.get("rule") or record["text"]
+
+
+class CommandHistoryLog:
+    """Command records in a JSON lines file, which is moved to <rotated_path>
+    once it grows too big. Records are buffered until flush is called."""
+
+    def __init__(self, path: Path, rotated_path: Path):
+        self.path = path
+        self.rotated_path = rotated_path
+        self.pending: list[dict] = []
+
+    def add(self, record: dict):
+        self.pending.append(record)
+
+    def flush(self, max_bytes: int):
+        """Appends the pending records to the log, rotating it first if it is
+        bigger than <max_bytes>"""
+        if not self.pending:
+            return
+        records, self.pending = self.pending, []
+
+        if self.path.is_file() and self.path.stat().st_size > max_bytes:
+            self.path.replace(self.rotated_path)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+
+    def read(self) -> Iterator[dict]:
+        """Yields every logged record, oldest first, including ones not yet
+        flushed"""
+        for path in (self.rotated_path, self.path):
+            if not path.is_file():
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        yield from self.pending
+
+    def command_frequency(self, app_name: Optional[str] = None) -> Counter:
+        """Counts how often each command was spoken, optionally only in
+        <app_name>"""
+        return Counter(
+            command_key(record)
+            for record in self.read()
+            if app_name is None or record.get("app") == app_name
+        )
+
+    def command_frequency_by_app(self) -> dict[str, Counter]:
+        """Counts how often each command was spoken in each application"""
+        counts: dict[str, Counter] = {}
+        for record in self.read():
+            counts.setdefault(record.get("app"), Counter())[command_key(record)] += 1
+        return counts
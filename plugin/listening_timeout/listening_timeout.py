@@ -1,6 +1,8 @@
 import time
 
-from talon import Context, Module, actions, app, cron, settings, speech_system, ui
+from talon import Context, Module, actions, app, cron, settings, ui
+
+from ...core.phrase_profiler.phrase_profiler import register_phrase_handler
 
 mod = Module()
 ctx = Context()
@@ -100,7 +102,7 @@ def on_ready():
     if actions.speech.enabled():
         start_timeout_job(calculate_timeout())
 
-    speech_system.register("post:phrase", post_phrase)
+    register_phrase_handler("post:phrase", post_phrase)
 
 
 app.register("ready", on_ready)
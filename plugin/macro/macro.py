@@ -1,4 +1,6 @@
-from talon import Context, Module, actions, clip, imgui, speech_system
+from talon import Context, Module, actions, clip, imgui
+
+from ...core.phrase_profiler.phrase_profiler import register_phrase_handler
 
 mod = Module()
 
@@ -99,4 +101,4 @@ def fn(d):
     actions.user.macro_append_command(d["parsed"]._unmapped)
 
 
-speech_system.register("pre:phrase", fn)
+register_phrase_handler("pre:phrase", fn)
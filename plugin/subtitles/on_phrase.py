@@ -1,6 +1,7 @@
-from talon import actions, speech_system
+from talon import actions
 from talon.grammar import Phrase
 
+from ...core.phrase_profiler.phrase_profiler import register_phrase_handler
 from .subtitles import show_subtitle
 
 
@@ -26,4 +27,4 @@ def skip_phrase_in_sleep(phrase: Phrase) -> bool:
     )
 
 
-speech_system.register("phrase", on_pre_phrase)
+register_phrase_handler("phrase", on_pre_phrase)
@@ -3,6 +3,8 @@ import re
 
 from talon import Context, Module, actions, settings
 
+from ...core.edit.edit_movement import movement_report
+
 ctx = Context()
 mod = Module()
 
@@ -74,14 +76,15 @@ class Actions:
             else navigation_target_name
         )
         function = navigate_left if direction in ("UP", "LEFT") else navigate_right
-        function(
-            navigation_action,
-            navigation_target_name,
-            before_or_after,
-            regex,
-            occurrence_number,
-            direction,
-        )
+        with movement_report(f"navigation {navigation_action} {direction}"):
+            function(
+                navigation_action,
+                navigation_target_name,
+                before_or_after,
+                regex,
+                occurrence_number,
+                direction,
+            )
 
     def navigation_by_name(
         navigation_action: str,  # GO, EXTEND, SELECT, DELETE, CUT, COPY
@@ -142,33 +145,32 @@ def get_current_selection_size():
     return len(actions.edit.selected_text())
 
 
-def go_right(i):
-    for j in range(0, i):
-        actions.edit.right()
+# The movement helpers take the text from the cursor to the line boundary in the
+# direction of the move, when it is known, so that user.cursor_move can use line or
+# word jumps instead of one key press per character.
+def go_right(i, text=""):
+    actions.user.cursor_move("right", i, text)
 
 
-def go_left(i):
-    for j in range(0, i):
-        actions.edit.left()
+def go_left(i, text=""):
+    actions.user.cursor_move("left", i, text)
 
 
-def extend_left(i):
-    for j in range(0, i):
-        actions.edit.extend_left()
+def extend_left(i, text=""):
+    actions.user.cursor_extend("left", i, text)
 
 
-def extend_right(i):
-    for j in range(0, i):
-        actions.edit.extend_right()
+def extend_right(i, text=""):
+    actions.user.cursor_extend("right", i, text)
 
 
-def select(direction, start, end, length):
+def select(direction, text, start, end, length):
     if direction == "RIGHT" or direction == "DOWN":
-        go_right(start)
-        extend_right(end - start)
+        go_right(start, text)
+        extend_right(end - start, text[start:])
     else:
-        go_left(length - end)
-        extend_left(end - start)
+        go_left(length - end, text)
+        extend_left(end - start, text[:end])
 
 
 def navigate_left(
@@ -249,7 +251,7 @@ def handle_navigation_action(
 ):
     length = len(text)
     if navigation_action == "GO":
-        handle_move(direction, before_or_after, start, end, length)
+        handle_move(direction, before_or_after, text, start, end, length)
     elif navigation_action == "SELECT":
         handle_select(
             navigation_target_name, before_or_after, direction, text, start, end, length
@@ -270,7 +272,7 @@ def handle_navigation_action(
         )
         actions.edit.copy()
     elif navigation_action == "EXTEND":
-        handle_extend(before_or_after, direction, start, end, length)
+        handle_extend(before_or_after, direction, text, start, end, length)
 
 
 def handle_select(
@@ -295,33 +297,33 @@ def handle_select(
         else:
             start = end + match2.start()
             end = end + match2.end()
-    select(direction, start, end, length)
+    select(direction, text, start, end, length)
 
 
-def handle_move(direction, before_or_after, start, end, length):
+def handle_move(direction, before_or_after, text, start, end, length):
     if direction == "RIGHT" or direction == "DOWN":
         if before_or_after == "BEFORE":
-            go_right(start)
+            go_right(start, text)
         else:
-            go_right(end)
+            go_right(end, text)
     else:
         if before_or_after == "AFTER":
-            go_left(length - end)
+            go_left(length - end, text)
         else:
-            go_left(length - start)
+            go_left(length - start, text)
 
 
-def handle_extend(before_or_after, direction, start, end, length):
+def handle_extend(before_or_after, direction, text, start, end, length):
     if direction == "RIGHT" or direction == "DOWN":
         if before_or_after == "BEFORE":
-            extend_right(start)
+            extend_right(start, text)
         else:
-            extend_right(end)
+            extend_right(end, text)
     else:
         if before_or_after == "AFTER":
-            extend_left(length - end)
+            extend_left(length - end, text)
         else:
-            extend_left(length - start)
+            extend_left(length - start, text)
 
 
 def match_backwards(regex, occurrence_number, subtext):
@@ -1,8 +1,24 @@
-import math
-from itertools import islice
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
+
+from talon import (
+    Context,
+    Module,
+    actions,
+    app,
+    cron,
+    imgui,
+    scope,
+    settings,
+    ui,
+)
 
-from talon import Context, Module, actions, app, imgui, scope, settings, ui
+from ...core.create_spoken_forms import SpokenFormsBuilder
 
 mod = Module()
 ctx = Context()
@@ -66,7 +82,8 @@ mod.setting(
     desc="Maximum like of string to display in the imgui",
 )
 cached_path = None
-file_selections = folder_selections = []
+# The path whose listing should be shown; results for other paths are dropped
+requested_path = None
 current_file_page = current_folder_page = 1
 
 ctx.lists["self.file_manager_directories"] = []
@@ -118,7 +135,7 @@ class Actions:
 
     def file_manager_update_lists():
         """Forces an update of the lists (e.g., when file or folder created)"""
-        update_lists()
+        update_lists(force=True)
 
     def file_manager_toggle_pickers():
         """Shows the pickers"""
@@ -137,19 +154,15 @@ class Actions:
 
     def file_manager_get_directory_by_index(index: int) -> str:
         """Returns the requested directory for the imgui display by index"""
-        index = (current_folder_page - 1) * settings.get(
-            "user.file_manager_imgui_limit"
-        ) + index
-        assert index < len(folder_selections)
-        return folder_selections[index]
+        index = (current_folder_page - 1) * folder_picker.page_size + index
+        assert index < len(folder_picker.values)
+        return folder_picker.values[index]
 
     def file_manager_get_file_by_index(index: int) -> str:
         """Returns the requested directory for the imgui display by index"""
-        index = (current_file_page - 1) * settings.get(
-            "user.file_manager_imgui_limit"
-        ) + index
-        assert index < len(file_selections)
-        return file_selections[index]
+        index = (current_file_page - 1) * file_picker.page_size + index
+        assert index < len(file_picker.values)
+        return file_picker.values[index]
 
     def file_manager_next_file_page():
         """next_file_page"""
@@ -195,80 +208,100 @@ class Actions:
             gui_folders.show()
 
 
-def is_dir(f):
+def is_dir(entry: os.DirEntry) -> bool:
     try:
-        return f.is_dir()
-    except:
+        # The file type comes from the directory listing, so only symlinks
+        # need another stat
+        return entry.is_dir(follow_symlinks=False) or (
+            entry.is_symlink() and entry.is_dir()
+        )
+    except OSError:
         return False
 
 
-def is_file(f):
+def is_file(entry: os.DirEntry) -> bool:
     try:
-        return f.is_file()
-    except:
+        return entry.is_file(follow_symlinks=False) or (
+            entry.is_symlink() and entry.is_file()
+        )
+    except OSError:
         return False
 
 
-def get_directory_map(current_path):
-    directories = [
-        f.name
-        for f in islice(
-            current_path.iterdir(), settings.get("user.file_manager_folder_limit", 1000)
-        )
-        if is_dir(f)
-    ]
+def scan_directory(
+    current_path: Path, folder_limit: int, file_limit: int
+) -> tuple[list[str], list[str]]:
+    """Lists the subdirectories and files of <current_path> in a single pass, up
+    to <folder_limit> and <file_limit>, sorted case-insensitively"""
+    directories = []
+    files = []
+
+    with os.scandir(current_path) as entries:
+        for entry in entries:
+            if len(directories) >= folder_limit and len(files) >= file_limit:
+                break
+            if is_dir(entry):
+                if len(directories) < folder_limit:
+                    directories.append(entry.name)
+            elif is_file(entry):
+                if len(files) < file_limit:
+                    files.append(entry.name)
+
     directories.sort(key=str.casefold)
-    return actions.user.create_spoken_forms_from_list(
-        directories, words_to_exclude=words_to_exclude
-    )
+    files.sort(key=str.casefold)
+    return directories, files
 
 
-def get_file_map(current_path):
-    files = [
-        f.name
-        for f in islice(
-            current_path.iterdir(), settings.get("user.file_manager_file_limit", 1000)
-        )
-        if is_file(f)
+def create_builder(names: list[str]) -> SpokenFormsBuilder:
+    builder = SpokenFormsBuilder(words_to_exclude=words_to_exclude)
+    builder.update({name: name for name in names})
+    return builder
+
+
+@dataclass
+class PickerModel:
+    """The pages of a picker, formatted once per listing instead of every frame"""
+
+    values: list[str]
+    page_size: int
+    pages: list[list[str]]
+
+
+def create_picker(values: list[str]) -> PickerModel:
+    page_size = settings.get("user.file_manager_imgui_limit")
+    string_limit = settings.get("user.file_manager_string_limit")
+    labels = [
+        value[:string_limit] + ".." if len(value) > string_limit else value
+        for value in values
     ]
-    files.sort(key=str.casefold)
-    return actions.user.create_spoken_forms_from_list(
-        files, words_to_exclude=words_to_exclude
-    )
+    pages = [
+        [
+            f"{index}: {label} "
+            for index, label in enumerate(labels[start : start + page_size], 1)
+        ]
+        for start in range(0, len(labels), page_size)
+    ]
+    return PickerModel(values, page_size, pages)
+
+
+def get_page(picker: PickerModel, page: int) -> list[str]:
+    if 0 < page <= len(picker.pages):
+        return picker.pages[page - 1]
+    return []
+
+
+folder_picker = file_picker = PickerModel([], 1, [])
 
 
 @imgui.open(y=10, x=900)
 def gui_folders(gui: imgui.GUI):
-    global current_folder_page, total_folder_pages
-    total_folder_pages = math.ceil(
-        len(ctx.lists["self.file_manager_directories"])
-        / settings.get("user.file_manager_imgui_limit")
-    )
+    global total_folder_pages
+    total_folder_pages = len(folder_picker.pages)
     gui.text(f"Select a directory ({current_folder_page}/{total_folder_pages})")
     gui.line()
 
-    index = 1
-    current_index = (current_folder_page - 1) * settings.get(
-        "user.file_manager_imgui_limit"
-    )
-
-    while index <= settings.get(
-        "user.file_manager_imgui_limit"
-    ) and current_index < len(folder_selections):
-        name = (
-            (
-                folder_selections[current_index][
-                    : settings.get("user.file_manager_string_limit")
-                ]
-                + ".."
-            )
-            if len(folder_selections[current_index])
-            > settings.get("user.file_manager_string_limit")
-            else folder_selections[current_index]
-        )
-        gui.text(f"{index}: {name} ")
-        current_index += 1
-        index = index + 1
+    for line in get_page(folder_picker, current_folder_page):
+        gui.text(line)
 
     # if total_folder_pages > 1:
     # gui.spacer()
@@ -286,36 +319,14 @@ def gui_folders(gui: imgui.GUI):
 
 @imgui.open(y=10, x=1300)
 def gui_files(gui: imgui.GUI):
-    global file_selections, current_file_page, total_file_pages
-    total_file_pages = math.ceil(
-        len(file_selections) / settings.get("user.file_manager_imgui_limit")
-    )
+    global total_file_pages
+    total_file_pages = len(file_picker.pages)
 
     gui.text(f"Select a file ({current_file_page}/{total_file_pages})")
     gui.line()
-    index = 1
-    current_index = (current_file_page - 1) * settings.get(
-        "user.file_manager_imgui_limit"
-    )
-
-    while index <= settings.get(
-        "user.file_manager_imgui_limit"
-    ) and current_index < len(file_selections):
-        name = (
-            (
-                file_selections[current_index][
-                    : settings.get("user.file_manager_string_limit")
-                ]
-                + ".."
-            )
-            if len(file_selections[current_index])
-            > settings.get("user.file_manager_string_limit")
-            else file_selections[current_index]
-        )
 
-        gui.text(f"{index}: {name} ")
-        current_index = current_index + 1
-        index = index + 1
+    for line in get_page(file_picker, current_file_page):
+        gui.text(line)
 
     # if total_file_pages > 1:
     #    gui.spacer()
@@ -328,7 +339,10 @@ def gui_files(gui: imgui.GUI):
 
 
 def clear_lists():
-    global folder_selections, file_selections, current_folder_page, current_file_page
+    global folder_picker, file_picker, current_folder_page, current_file_page
+    global requested_path
+    requested_path = None
+    poll_directory(None)
     if (
         len(ctx.lists["self.file_manager_directories"]) > 0
         or len(ctx.lists["self.file_manager_files"]) > 0
@@ -340,8 +354,7 @@ def clear_lists():
                 "self.file_manager_files": [],
             }
         )
-        folder_selections = []
-        file_selections = []
+        folder_picker = file_picker = PickerModel([], 1, [])
 
 
 def update_gui():
@@ -350,32 +363,130 @@ def update_gui():
         gui_files.show()
 
 
-def update_lists(path=None):
-    global folder_selections, file_selections, current_folder_page, current_file_page
-    is_valid_path = False
-    if not path:
-        path = actions.user.file_manager_current_path()
-    directories = {}
-    files = {}
-    folder_selections = []
-    file_selections = []
-    # print(path)
+@dataclass
+class DirectoryListing:
+    # Modification time of the directory when it was listed
+    mtime_ns: int
+    # Names of the entries, sorted case-insensitively
+    directory_names: list[str]
+    file_names: list[str]
+    directories: SpokenFormsBuilder
+    files: SpokenFormsBuilder
+
+
+EMPTY_LISTING = DirectoryListing(0, [], [], SpokenFormsBuilder(), SpokenFormsBuilder())
+
+# Number of recently visited directories whose listings are kept
+LISTING_CACHE_SIZE = 32
+
+# Listings by path, least recently used first. Written by the worker thread.
+listing_cache: OrderedDict[str, DirectoryListing] = OrderedDict()
+listing_cache_lock = threading.Lock()
+
+# Lists directories off the main thread, so slow disks and network mounts
+# don't freeze Talon
+listing_executor = ThreadPoolExecutor(max_workers=1)
+
+# Talon's fs.watch is recursive, which is far too much for a directory like
+# the home folder, so instead the shown directory's modification time is
+# polled for changes to its entries
+POLL_INTERVAL = "1s"
+polled_path = None
+poll_job = None
+
+
+def get_cached_listing(path: str) -> Optional[DirectoryListing]:
+    with listing_cache_lock:
+        listing = listing_cache.get(path)
+        if listing is not None:
+            listing_cache.move_to_end(path)
+        return listing
+
+
+def cache_listing(path: str, listing: DirectoryListing):
+    with listing_cache_lock:
+        if listing is EMPTY_LISTING:
+            listing_cache.pop(path, None)
+            return
+        listing_cache[path] = listing
+        listing_cache.move_to_end(path)
+        while len(listing_cache) > LISTING_CACHE_SIZE:
+            listing_cache.popitem(last=False)
+
+
+def list_directory(
+    path: str,
+    cached: Optional[DirectoryListing],
+    folder_limit: int,
+    file_limit: int,
+) -> Optional[DirectoryListing]:
+    """Lists <path> and creates the spoken forms, unless <cached> is still up to
+    date, in which case returns None. Runs on the worker thread."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except (OSError, ValueError):
+        cache_listing(path, EMPTY_LISTING)
+        return EMPTY_LISTING
+
+    if cached is not None and cached.mtime_ns == mtime_ns:
+        return None
+
     try:
-        current_path = Path(path)
-        is_valid_path = current_path.is_dir()
-    except:
-        is_valid_path = False
-
-    if is_valid_path:
-        # print("valid..." + str(current_path))
-        try:
-            directories = get_directory_map(current_path)
-            files = get_file_map(current_path)
-        except:
-            # print("invalid path...")
-
-            directories = {}
-            files = {}
+        directory_names, file_names = scan_directory(
+            Path(path), folder_limit, file_limit
+        )
+        listing = DirectoryListing(
+            mtime_ns,
+            directory_names,
+            file_names,
+            create_builder(directory_names),
+            create_builder(file_names),
+        )
+    except Exception:
+        listing = EMPTY_LISTING
+
+    cache_listing(path, listing)
+    return listing
+
+
+def refresh_listing(
+    path: str, folder_limit: int, file_limit: int
+) -> Optional[DirectoryListing]:
+    """Lists <path> again if it changed since its cached listing, only creating
+    spoken forms for new entries. Returns None if nothing changed. Runs on the
+    worker thread."""
+    listing = get_cached_listing(path)
+    if listing is None or listing is EMPTY_LISTING:
+        return None
+
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        if mtime_ns == listing.mtime_ns:
+            return None
+        directory_names, file_names = scan_directory(
+            Path(path), folder_limit, file_limit
+        )
+    except (OSError, ValueError):
+        return None
+
+    for builder, old_names, new_names in (
+        (listing.directories, listing.directory_names, directory_names),
+        (listing.files, listing.file_names, file_names),
+    ):
+        old, new = set(old_names), set(new_names)
+        builder.update({name: name for name in new_names if name not in old}, old - new)
+
+    # New lists rather than changing them, the main thread may be reading them
+    listing.directory_names = directory_names
+    listing.file_names = file_names
+    listing.mtime_ns = mtime_ns
+    return listing
+
+
+def show_listing(listing: DirectoryListing):
+    global folder_picker, file_picker, current_folder_page, current_file_page
+    directories = listing.directories.spoken_forms
+    files = listing.files.spoken_forms
 
     current_folder_page = current_file_page = 1
     ctx.lists.update(
@@ -385,14 +496,78 @@ def update_lists(path=None):
         }
     )
 
-    folder_selections = list(set(directories.values()))
-    folder_selections.sort(key=str.casefold)
-    file_selections = list(set(files.values()))
-    file_selections.sort(key=str.casefold)
+    # The names are kept sorted, so they don't need sorting again here
+    folder_picker = create_picker(listing.directory_names)
+    file_picker = create_picker(listing.file_names)
 
     update_gui()
 
 
+def on_listing(path: str, listing: Optional[DirectoryListing]):
+    """Shows a listing from the worker thread. Runs on the main thread."""
+    if path == requested_path and listing is not None:
+        show_listing(listing)
+
+
+def update_lists(path=None, force=False):
+    """Shows the listing of <path>, or the current path. A cached listing is
+    shown straight away and refreshed in the background if the directory has
+    changed since."""
+    global requested_path
+    if not path:
+        path = actions.user.file_manager_current_path()
+    requested_path = path
+    poll_directory(path)
+
+    cached = get_cached_listing(path)
+    show_listing(cached or EMPTY_LISTING)
+    if force:
+        cached = None
+
+    folder_limit = settings.get("user.file_manager_folder_limit", 1000)
+    file_limit = settings.get("user.file_manager_file_limit", 1000)
+
+    def run():
+        # Skip paths the user already left while this was queued
+        if path != requested_path:
+            return
+        listing = list_directory(path, cached, folder_limit, file_limit)
+        cron.after("0ms", lambda: on_listing(path, listing))
+
+    listing_executor.submit(run)
+
+
+def poll_directory(path: Optional[str]):
+    """Polls <path> for changes instead of the previously polled directory"""
+    global polled_path, poll_job
+    if path == polled_path:
+        return
+    cron.cancel(poll_job)
+    poll_job = None
+    polled_path = path
+    if path:
+        poll_job = cron.interval(POLL_INTERVAL, refresh_lists)
+
+
+def refresh_lists():
+    """Updates the shown lists in the background if the directory changed"""
+    path = requested_path
+    if path is None:
+        return
+
+    folder_limit = settings.get("user.file_manager_folder_limit", 1000)
+    file_limit = settings.get("user.file_manager_file_limit", 1000)
+
+    def run():
+        if path != requested_path:
+            return
+        listing = refresh_listing(path, folder_limit, file_limit)
+        if listing is not None:
+            cron.after("0ms", lambda: on_listing(path, listing))
+
+    listing_executor.submit(run)
+
+
 def win_event_handler(window):
     global cached_path
 
@@ -412,6 +587,8 @@ def win_event_handler(window):
     if path:
         if cached_path != path:
             update_lists(path)
+        else:
+            refresh_lists()
     elif cached_path:
         clear_lists()
         actions.user.file_manager_hide_pickers()
@@ -34,6 +34,13 @@ class EditActions:
 
 @ctx.action_class("user")
 class Actions:
+    def word_keys(direction: str, count: int, extend: bool):
+        if extend:
+            actions.next(direction, count, extend)
+        else:
+            key = "alt-b" if direction == "left" else "alt-f"
+            actions.key(f"{key}:{count}")
+
     def cut_line():
         actions.edit.line_start()
         actions.key("ctrl-k")
@@ -0,0 +1,73 @@
+"""
+Times parse_number against the previous implementation on long digit strings,
+like phone numbers and IDs, and on numbers with scale words:
+
+    python test/benchmark_parse_number.py [--digits N] [--verify]
+
+--verify also checks every spoken form of every number up to 10^7 against the
+previous implementation, which takes a while.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parents[1]
+
+
+def time_ms(parse, words: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse(words)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse_number")
+    parser.add_argument("--digits", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=1_000)
+    parser.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+
+    sys.path[:0] = [
+        str(REPO_DIR),
+        str(REPO_DIR / "test"),
+        str(REPO_DIR / "test" / "stubs"),
+    ]
+    from test_numbers import (
+        check_spoken_forms,
+        reference_parse_number,
+        spoken_forms,
+    )
+
+    from core.numbers.numbers import digit_list, parse_number
+
+    rng = random.Random(0)
+    phrases = {
+        "phone number": "five five five oh one two three four five six seven",
+        f"{args.digits} digits": " ".join(rng.choices(digit_list, k=args.digits)),
+        "scales": "one million two hundred and thirty four thousand five hundred sixty seven",
+        "scales spoken 10 times": " ".join(
+            word for n in range(1_000_000, 1_000_010) for word in next(spoken_forms(n))
+        ),
+    }
+    for name, phrase in phrases.items():
+        words = phrase.split()
+        assert parse_number(words) == reference_parse_number(words)
+        new_ms = time_ms(parse_number, words, args.repeat)
+        old_ms = time_ms(reference_parse_number, words, args.repeat)
+        print(
+            f"{name}: {new_ms * 1000:.1f} us, previously {old_ms * 1000:.1f} us"
+            f" ({old_ms / new_ms:.1f}x)"
+        )
+
+    if args.verify:
+        start = time.perf_counter()
+        checked = check_spoken_forms(range(10**7 + 1))
+        print(f"verified {checked} spoken forms in {time.perf_counter() - start:.0f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Times PhraseReplacer on many replacement rules and long dictations:
+
+    python test/benchmark_phrase_replacer.py [--rules N] [--words N]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parents[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the phrase replacer")
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--words", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    sys.path[:0] = [str(REPO_DIR), str(REPO_DIR / "test" / "stubs")]
+    from core.vocabulary.vocabulary import PhraseReplacer
+
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(2_000)]
+    rules = {}
+    while len(rules) < args.rules:
+        spoken_form = " ".join(rng.choices(vocabulary, k=rng.randint(1, 4)))
+        rules[spoken_form] = f"rule{len(rules)}"
+    dictation = rng.choices(vocabulary, k=args.words)
+
+    replacer = PhraseReplacer()
+    start = time.perf_counter()
+    replacer.update(rules)
+    update_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        replacer.replace(dictation)
+    replace_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    print(f"update: {update_ms:.2f} ms for {len(rules)} rules")
+    print(f"replace: {replace_ms:.3f} ms for {args.words} words")
+
+
+if __name__ == "__main__":
+    main()
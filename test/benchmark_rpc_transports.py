@@ -0,0 +1,65 @@
+"""
+Compares the round trip latency of the request file and socket transports of
+the rpc client, against the stand-in command server:
+
+    python test/benchmark_rpc_transports.py [--count N]
+"""
+
+import argparse
+import shutil
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+REPO_DIR = Path(__file__).parents[1]
+
+
+def benchmark(use_socket: bool, count: int) -> list[float]:
+    from command_server import CommandServer
+
+    from core.command_client.rpc_client.get_communication_dir_path import (
+        get_communication_dir_path,
+    )
+    from core.command_client.rpc_client.rpc_client import run_single_command
+    from core.command_client.rpc_client.socket_transport import close_connection
+    from core.command_client.rpc_client.types import Command
+
+    dir_name = f"talon-benchmark-{uuid4()}"
+    server = CommandServer(
+        get_communication_dir_path(dir_name),
+        {"echo": lambda value: value},
+        use_socket=use_socket,
+    )
+    server.start()
+    try:
+        timings = []
+        for i in range(count):
+            start = time.perf_counter()
+            run_single_command(
+                dir_name, server.trigger, Command("echo", [i]), False, True
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+    finally:
+        close_connection(server.communication_dir_path)
+        server.stop()
+        shutil.rmtree(server.communication_dir_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rpc transports")
+    parser.add_argument("--count", type=int, default=500)
+    args = parser.parse_args()
+
+    sys.path[:0] = [str(REPO_DIR), str(REPO_DIR / "test" / "stubs")]
+
+    for name, use_socket in (("file", False), ("socket", True)):
+        timings = sorted(benchmark(use_socket, args.count))
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, len(timings) * 99 // 100)]
+        print(f"{name:>6}: p50 {p50:.3f} ms  p99 {p99:.3f} ms  n={len(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+A stand-in for an application's command server, for testing and benchmarking
+the rpc client. Serves both the request file protocol and the socket protocol.
+"""
+
+import json
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+from core.command_client.rpc_client.socket_transport import (
+    SOCKET_NAME,
+    receive_message,
+    send_message,
+)
+
+
+class CommandServer:
+    def __init__(
+        self,
+        communication_dir_path: Path,
+        commands: dict[str, Callable[..., Any]],
+        use_socket: bool = True,
+        support_batch: bool = True,
+    ):
+        self.communication_dir_path = communication_dir_path
+        self.commands = commands
+        self.use_socket = use_socket
+        self.support_batch = support_batch
+        self.requests: list[dict] = []
+        self.connection_count = 0
+        self.listener = None
+
+    def start(self):
+        self.communication_dir_path.mkdir(parents=True, exist_ok=True)
+        if not self.use_socket:
+            return
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(str(self.communication_dir_path / SOCKET_NAME))
+        self.listener.listen()
+        threading.Thread(target=self.accept_connections, daemon=True).start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.close()
+            (self.communication_dir_path / SOCKET_NAME).unlink(missing_ok=True)
+
+    def accept_connections(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+            self.connection_count += 1
+            threading.Thread(
+                target=self.serve_connection, args=(connection,), daemon=True
+            ).start()
+
+    def serve_connection(self, connection: socket.socket):
+        with connection:
+            while True:
+                try:
+                    body = receive_message(connection)
+                except (ConnectionError, OSError):
+                    return
+                send_message(connection, self.handle(body))
+
+    def trigger(self):
+        """Stands in for the trigger keystroke, answering the request file"""
+        threading.Thread(target=self.handle_request_file, daemon=True).start()
+
+    def handle_request_file(self):
+        body = json.loads((self.communication_dir_path / "request.json").read_text())
+        response = json.dumps(self.handle(body)) + "\n"
+        (self.communication_dir_path / "response.json").write_text(response)
+
+    def run(self, command_id: str, args: list[Any]) -> dict:
+        try:
+            return {"returnValue": self.commands[command_id](*args), "error": None}
+        except Exception as e:
+            return {"returnValue": None, "error": str(e)}
+
+    def handle(self, body: dict) -> dict:
+        self.requests.append(body)
+        response = {"uuid": body["uuid"], "warnings": [], "error": None}
+        if self.support_batch and "commands" in body:
+            response["results"] = [
+                self.run(command["commandId"], command["args"])
+                for command in body["commands"]
+            ]
+        else:
+            response.update(self.run(body["commandId"], body["args"]))
+        return response
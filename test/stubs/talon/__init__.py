@@ -151,7 +151,7 @@ class ImgUI:
 
     GUI = None
 
-    def open(self):
+    def open(self, **kwargs):
         def __funcwrapper(func):
             def __inner(*args, **kwargs):
                 return func(*args, **kwargs)
@@ -194,6 +194,42 @@ class Resource:
         return lambda f: f
 
 
+class FS:
+    """
+    Implements something like talon.fs
+    """
+
+    def watch(self, path: str, callback):
+        pass
+
+    def unwatch(self, path: str, callback):
+        pass
+
+
+class Cron:
+    """
+    Stub out cron, scheduled jobs never run in tests
+    """
+
+    def after(self, delay: str, callback):
+        pass
+
+    def cancel(self, job):
+        pass
+
+
+class SpeechSystem:
+    """
+    Stub out speech_system so we don't get crashes
+    """
+
+    def register(self, topic: str, callback):
+        pass
+
+    def unregister(self, topic: str, callback):
+        pass
+
+
 class App:
     """
     Implements something like the talon app variable
@@ -201,15 +237,21 @@ class App:
 
     platform = "mac"
 
+    def register(*args, **kwargs):
+        pass
+
 
 actions = Actions()
 app = App
 clip = None
+cron = Cron()
 imgui = ImgUI()
 ui = UI()
 settings = Settings()
 resource = Resource()
 registry = Registry()
+fs = FS()
+speech_system = SpeechSystem()
 
 # Indicate to test files that they should load since we're running in test mode
 test_mode = True
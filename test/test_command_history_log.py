@@ -0,0 +1,51 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from plugin.command_history.command_history_log import CommandHistoryLog
+
+    def make_log(tmp_path) -> CommandHistoryLog:
+        return CommandHistoryLog(
+            tmp_path / "command_history.jsonl", tmp_path / "command_history.1.jsonl"
+        )
+
+    def record(app: str, rule: str, text: str) -> dict:
+        return {"app": app, "rule": rule, "text": text}
+
+    def test_rotates_log_once_too_big(tmp_path):
+        log = make_log(tmp_path)
+        log.add(record("Code", "go left", "go left five"))
+        log.flush(max_bytes=10)
+        assert not log.rotated_path.exists()
+
+        log.add(record("Code", "go left", "go left six"))
+        log.flush(max_bytes=10)
+        assert log.rotated_path.read_text(encoding="utf-8").count("\n") == 1
+        assert log.path.read_text(encoding="utf-8").count("\n") == 1
+
+    def test_reads_rotated_then_current_then_pending(tmp_path):
+        log = make_log(tmp_path)
+        for text in ["one", "two", "three"]:
+            log.add(record("Code", "word", text))
+            log.flush(max_bytes=0)
+        log.add(record("Code", "word", "four"))
+        with open(log.path, "a", encoding="utf-8") as f:
+            f.write("not json\n")
+
+        assert [r["text"] for r in log.read()] == ["two", "three", "four"]
+
+    def test_counts_commands_by_rule(tmp_path):
+        log = make_log(tmp_path)
+        log.add(record("Code", "go left", "go left five"))
+        log.add(record("Code", "go left", "go left six"))
+        log.add(record("Slack", "go left", "go left two"))
+        log.add({"app": "Slack", "text": "logged before rules"})
+        log.flush(max_bytes=1_000_000)
+
+        assert log.command_frequency() == {"go left": 3, "logged before rules": 1}
+        assert log.command_frequency("Code") == {"go left": 2}
+        assert log.command_frequency_by_app() == {
+            "Code": {"go left": 2},
+            "Slack": {"go left": 1, "logged before rules": 1},
+        }
@@ -20,16 +20,23 @@ if hasattr(talon, "test_mode"):
         headers: tuple[str, str],
         default: dict[str, str] = None,
         is_spoken_form_first: bool = False,
+        with_diff: bool = False,
     ) -> DecoratorT:
         def decorator(fn: CallbackT) -> CallbackT:
             extensions = {
                 "dot see sharp": ".cs",
             }
             abbreviations = {"source": "src", "whats app": "WhatsApp"}
-            if filename == "abbreviations.csv":
-                fn(abbreviations)
-            elif filename == "file_extensions.csv":
-                fn(extensions)
+            values = {
+                "abbreviations.csv": abbreviations,
+                "file_extensions.csv": extensions,
+            }.get(filename)
+            if values is None:
+                return
+            if with_diff:
+                fn(values, core.user_settings.diff_csv_lists({}, values))
+            else:
+                fn(values)
 
         return decorator
 
@@ -163,3 +170,16 @@ if hasattr(talon, "test_mode"):
             # Generated forms at least as numerous as input if subseq is True
             if subseq:
                 assert len(result) >= len(tokens), statement
+
+    def test_builder_matches_full_rebuild():
+        builder = core.create_spoken_forms.SpokenFormsBuilder()
+        builder.update({"hello world": "hello world", "hello": "hello"})
+        result = builder.update(
+            {"world peace": "world peace", "README.md": "README.md"},
+            removed=["hello", "missing"],
+        )
+
+        names = ["hello world", "world peace", "README.md"]
+        assert result == actions.user.create_spoken_forms_from_list(names)
+        assert "hello" not in builder
+        assert len(builder) == 3
@@ -0,0 +1,36 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from core.edit.edit_movement import plan_movement
+
+    def test_moves_by_character_without_text():
+        assert plan_movement("left", 80) == ("char", 80)
+        assert plan_movement("down", 3, "some text") == ("char", 3)
+        assert plan_movement("right", 0) == ("char", 0)
+
+    def test_jumps_to_line_boundary():
+        assert plan_movement("left", 11, "hello world") == ("line", 1)
+        assert plan_movement("right", 5, "hello") == ("line", 1)
+
+        # Smart home may stop at the indentation, and multiple lines can't be jumped
+        assert plan_movement("left", 9, "    hello") == ("char", 9)
+        assert plan_movement("left", 11, "hello\nworld") == ("char", 11)
+
+    def test_jumps_by_words_to_the_left():
+        def plan(count, text):
+            return plan_movement("left", count, text, word_jumps=True)
+
+        assert plan(11, "x = hello world") == ("word", 2)
+        assert plan(12, "x = hello world ") == ("word", 2)
+
+        # The target must be at the start of a word
+        assert plan(11, "xhello world") == ("char", 11)
+        # Underscores and punctuation split words differently between editors
+        assert plan(11, "x hello_world") == ("char", 11)
+        # Word jumps are opt in
+        assert plan_movement("left", 11, "x hello world") == ("char", 11)
+
+    def test_does_not_jump_by_words_to_the_right():
+        assert plan_movement("right", 11, "hello world!") == ("char", 11)
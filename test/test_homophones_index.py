@@ -0,0 +1,35 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from core.homophones.homophones_index import HomophoneIndex, parse_homophones
+
+    def test_merges_lines_sharing_a_word():
+        canonicals, groups = parse_homophones(
+            ["where,wear,ware\n", "pair,pear\n", "Ware,Wear\n", "\n", "pare,pear,\n"]
+        )
+
+        assert canonicals == ["where", "pair", "Ware", "pare"]
+        assert groups == [
+            ("Ware", "Wear", "ware", "wear", "where"),
+            ("pair", "pare", "pear"),
+        ]
+
+    def test_finds_homophones_of_any_word_in_a_group():
+        index = HomophoneIndex([("pair", "pare", "pear"), ("Aaron", "Erin")])
+
+        assert index.get("pear") == ["pair", "pare", "pear"]
+        assert index.get("erin") == ["Aaron", "Erin"]
+        assert index.get("pears") is None
+
+    def test_finds_homophones_with_suffixes():
+        index = HomophoneIndex([("pair", "pare", "pear"), ("bare", "bear")])
+        index.set_suffixes(["s", "ed", "ing"])
+
+        assert index.get("pears") == ["pairs", "pares", "pears"]
+        assert index.get("baring") == ["baring", "bearing"]
+        assert index.get("pears", use_suffixes=False) is None
+
+        index.set_suffixes(["s"])
+        assert index.get("baring") is None
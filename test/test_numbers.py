@@ -0,0 +1,135 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from typing import Iterator, Union
+
+    from core.numbers.numbers import (
+        digit_list,
+        parse_number,
+        scales,
+        scales_map,
+        scan_small_numbers,
+        teens,
+        tens,
+    )
+
+    # The previous implementation of parse_number, which applies each scale to
+    # the whole phrase in turn. parse_number must give the same results.
+    def reference_parse_number(l: list[str]) -> str:
+        l = list(scan_small_numbers(l))
+        for scale in scales:
+            l = reference_parse_scale(scale, l)
+        return "".join(str(n) for n in l)
+
+    def reference_parse_scale(
+        scale: str, l: list[Union[str, int]]
+    ) -> list[Union[str, int]]:
+        scale_value = scales_map[scale]
+        scale_digits = len(str(scale_value))
+
+        left, *splits = reference_split_list(scale, l)
+        for right in splits:
+            before = 1
+            if left and isinstance(left[-1], int) and left[-1] != 0:
+                before = left.pop()
+
+            after = ""
+            while right and isinstance(right[0], int):
+                next = after + str(right[0])
+                if len(next) >= scale_digits:
+                    break
+                after = next
+                right.pop(0)
+            after = int(after) if after else 0
+
+            left.append(before * scale_value + after)
+            left.extend(right)
+
+        return left
+
+    def reference_split_list(value, l: list) -> Iterator:
+        start = 0
+        while True:
+            try:
+                i = l.index(value, start)
+            except ValueError:
+                break
+            yield l[start:i]
+            start = i + 1
+        yield l[start:]
+
+    def say_under_one_thousand(n: int, use_and: bool) -> list[str]:
+        words = []
+        hundreds, rest = divmod(n, 100)
+        if hundreds:
+            words += [digit_list[hundreds], "hundred"]
+            if rest and use_and:
+                words.append("and")
+        if rest >= 20:
+            words.append(tens[rest // 10 - 2])
+            if rest % 10:
+                words.append(digit_list[rest % 10])
+        elif rest >= 10:
+            words.append(teens[rest - 10])
+        elif rest:
+            words.append(digit_list[rest])
+        return words
+
+    def spoken_forms(n: int) -> Iterator[list[str]]:
+        """Ways of saying <n>: with scale words, with and without "and", and
+        digit by digit"""
+        for use_and in (False, True):
+            words = []
+            for i in reversed(range(len(scales))):
+                group = n // 1000**i % 1000
+                if group:
+                    words += say_under_one_thousand(group, use_and)
+                    if i:
+                        words.append(scales[i])
+            yield words or ["zero"]
+        yield [digit_list[int(digit)] for digit in str(n)]
+
+    def numbers_up_to_ten_million() -> Iterator[int]:
+        """Every number below 2,000, then a spread of numbers up to 10^7. Pass
+        range(10**7 + 1) to check_spoken_forms to check all of them."""
+        yield from range(2_000)
+        yield from range(2_000, 10**7 + 1, 9_973)
+        yield 10**7
+
+    def check_spoken_forms(numbers: Iterator[int]) -> int:
+        checked = 0
+        for n in numbers:
+            for words in spoken_forms(n):
+                expected = reference_parse_number(words)
+                assert parse_number(words) == expected, words
+                checked += 1
+        return checked
+
+    def test_parses_spoken_forms_like_reference():
+        assert check_spoken_forms(numbers_up_to_ten_million()) > 0
+
+    def test_parses_spoken_forms_as_their_value():
+        for n in (0, 7, 105, 1_066, 105_000, 1_501_106, 10**7):
+            for words in spoken_forms(n):
+                assert parse_number(words) == str(n), words
+
+    def test_parses_unusual_phrases_like_reference():
+        phrases = [
+            "one thousand thousand",
+            "thousand hundred",
+            "hundred thousand",
+            "ten four",
+            "nineteen oh six",
+            "twenty oh one",
+            "one million one one",
+            "one million ten ten",
+            "one hundred thousand and five thousand and six thousand",
+            "one two three thousand four five six seven",
+            "zero hundred zero thousand",
+            "five million three hundred million two thousand thousand",
+        ]
+        for phrase in phrases:
+            words = phrase.split()
+            assert parse_number(words) == reference_parse_number(words), phrase
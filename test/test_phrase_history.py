@@ -0,0 +1,54 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from core.text.phrase_history import PhraseHistory
+
+    def test_keeps_most_recent_phrases_first():
+        history = PhraseHistory(3)
+        for text in ["one", "two", "three", "four"]:
+            history.add(text)
+
+        assert list(history) == ["four", "three", "two"]
+        assert history[0] == "four"
+        assert history.pop() == "four"
+        assert list(history) == ["three", "two"]
+
+    def test_searches_by_word():
+        history = PhraseHistory(3)
+        for text in ["hello world", "goodbye world", "Hello there", "hello again"]:
+            history.add(text)
+
+        assert history.search("hello", 10) == [(1, "hello again"), (2, "Hello there")]
+        assert history.search("world", 10) == [(3, "goodbye world")]
+        assert history.search("hello there", 10) == [(2, "Hello there")]
+        assert history.search("hello", 1) == [(1, "hello again")]
+        assert history.search("missing", 10) == []
+
+        history.pop()
+        assert history.search("again", 10) == []
+        assert history.search("hello", 10) == [(1, "Hello there")]
+
+        history.add("hello world again")
+        assert history.search("hello", 10) == [
+            (1, "hello world again"),
+            (2, "Hello there"),
+        ]
+        assert history.search("world", 10) == [
+            (1, "hello world again"),
+            (3, "goodbye world"),
+        ]
+
+    def test_resize_keeps_most_recent_phrases():
+        history = PhraseHistory(4)
+        for text in ["one", "two", "three", "four"]:
+            history.add(text)
+
+        history.resize(2)
+        assert list(history) == ["four", "three"]
+        assert history.search("one", 10) == []
+
+        history.resize(3)
+        history.add("five")
+        assert list(history) == ["five", "four", "three"]
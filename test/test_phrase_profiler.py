@@ -0,0 +1,33 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from core.phrase_profiler.phrase_profiler import WINDOW_SIZE, RollingTimings
+
+    def test_percentiles_use_nearest_rank():
+        timings = RollingTimings()
+        assert timings.percentile(50) == 0.0
+
+        for duration in range(100, 0, -1):
+            timings.add(float(duration))
+
+        assert timings.percentile(0) == 1.0
+        assert timings.percentile(50) == 50.0
+        assert timings.percentile(95) == 95.0
+        assert timings.percentile(99) == 99.0
+        assert timings.percentile(100) == 100.0
+
+        timings = RollingTimings()
+        timings.add(3.0)
+        assert [timings.percentile(p) for p in (0, 50, 99)] == [3.0, 3.0, 3.0]
+
+    def test_keeps_only_the_last_window():
+        timings = RollingTimings()
+        for duration in range(WINDOW_SIZE + 50):
+            timings.add(float(duration))
+            # Percentiles are recomputed after every add
+            assert timings.percentile(100) == duration
+
+        assert len(timings) == WINDOW_SIZE
+        assert timings.percentile(0) == 50.0
@@ -0,0 +1,102 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    import shutil
+    from uuid import uuid4
+
+    from command_server import CommandServer
+
+    from core.command_client.rpc_client.get_communication_dir_path import (
+        get_communication_dir_path,
+    )
+    from core.command_client.rpc_client.rpc_client import (
+        run_batch,
+        run_single_command,
+        servers_without_batch_support,
+    )
+    from core.command_client.rpc_client.socket_transport import close_connection
+    from core.command_client.rpc_client.types import Command, CommandResult
+
+    def fail(message):
+        raise Exception(message)
+
+    COMMANDS = {"add": lambda a, b: a + b, "fail": fail}
+
+    def start_server(**kwargs) -> tuple[str, CommandServer]:
+        dir_name = f"talon-test-{uuid4()}"
+        server = CommandServer(get_communication_dir_path(dir_name), COMMANDS, **kwargs)
+        server.start()
+        return dir_name, server
+
+    def stop_server(dir_name: str, server: CommandServer):
+        close_connection(server.communication_dir_path)
+        server.stop()
+        shutil.rmtree(server.communication_dir_path)
+
+    def test_runs_command_over_socket():
+        dir_name, server = start_server()
+        try:
+            for i in range(3):
+                result = run_single_command(
+                    dir_name, fail, Command("add", [i, 1]), False, True
+                )
+                assert result == i + 1
+            # The connection is kept open between commands
+            assert server.connection_count == 1
+            assert not (server.communication_dir_path / "request.json").exists()
+        finally:
+            stop_server(dir_name, server)
+
+    def test_falls_back_to_request_file_without_socket():
+        dir_name, server = start_server(use_socket=False)
+        try:
+            result = run_single_command(
+                dir_name, server.trigger, Command("add", [1, 2]), False, True
+            )
+            assert result == 3
+            assert not (server.communication_dir_path / "request.json").exists()
+            assert not (server.communication_dir_path / "response.json").exists()
+        finally:
+            stop_server(dir_name, server)
+
+    def test_runs_batch_in_one_request():
+        dir_name, server = start_server()
+        try:
+            commands = [
+                Command("add", [1, 2]),
+                Command("fail", ["oops"]),
+                Command("add", [3, 4]),
+            ]
+            results = run_batch(dir_name, fail, commands, False, True)
+            assert results == [
+                CommandResult(3, None),
+                CommandResult(None, "oops"),
+                CommandResult(7, None),
+            ]
+            assert len(server.requests) == 1
+        finally:
+            stop_server(dir_name, server)
+
+    def test_runs_batch_separately_without_server_support():
+        dir_name, server = start_server(use_socket=False, support_batch=False)
+        try:
+            commands = [
+                Command("add", [1, 2]),
+                Command("fail", ["oops"]),
+                Command("add", [3, 4]),
+            ]
+            results = run_batch(dir_name, server.trigger, commands, False, True)
+            assert results == [
+                CommandResult(3, None),
+                CommandResult(None, "oops"),
+                CommandResult(7, None),
+            ]
+            # Each command ran once, and later batches aren't attempted
+            assert len(server.requests) == 3
+            assert dir_name in servers_without_batch_support
+            run_batch(dir_name, server.trigger, commands, False, True)
+            assert all("commands" not in request for request in server.requests[3:])
+        finally:
+            stop_server(dir_name, server)
@@ -0,0 +1,82 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    import time
+
+    import pytest
+
+    import core.settings_files
+    from core.settings_files import (
+        SettingsFile,
+        load_batch,
+        register_settings_file,
+    )
+
+    class RecordingCron:
+        """Keeps scheduled jobs so the test can run them"""
+
+        def __init__(self):
+            self.jobs = []
+
+        def after(self, delay: str, callback):
+            self.jobs.append(callback)
+
+        def wait_for_job(self):
+            deadline = time.monotonic() + 5
+            while not self.jobs:
+                assert time.monotonic() < deadline, "no job was scheduled"
+                time.sleep(0.01)
+            return self.jobs.pop(0)
+
+    @pytest.fixture
+    def cron(monkeypatch):
+        cron = RecordingCron()
+        monkeypatch.setattr(core.settings_files, "cron", cron)
+        monkeypatch.setattr(core.settings_files, "settings_files", {})
+        return cron
+
+    applied = []
+
+    def apply_numbers(numbers):
+        applied.append(numbers)
+
+    def test_parses_then_applies_registered_files(tmp_path, cron):
+        applied.clear()
+        path = tmp_path / "numbers.txt"
+        path.write_text("1 2 3", encoding="utf-8")
+
+        def parse(path):
+            return [int(n) for n in path.read_text(encoding="utf-8").split()]
+
+        register_settings_file(path, parse, apply_numbers)
+        # Registering again, as on reload, replaces the entry
+        register_settings_file(path, parse, apply_numbers)
+        assert len(core.settings_files.settings_files) == 1
+
+        cron.wait_for_job()()  # start_batch
+        assert applied == []
+        cron.wait_for_job()()  # apply_batch on the main thread
+        assert applied == [[1, 2, 3]]
+
+    def test_skips_unchanged_files_and_isolates_errors(tmp_path, cron):
+        applied.clear()
+
+        def fail(value):
+            raise ValueError(value)
+
+        entries = [
+            SettingsFile(tmp_path / "unchanged", lambda path: None, apply_numbers),
+            SettingsFile(tmp_path / "bad parse", fail, apply_numbers),
+            SettingsFile(tmp_path / "bad apply", lambda path: [1], fail),
+            SettingsFile(tmp_path / "good", lambda path: [2], apply_numbers),
+        ]
+        load_batch(entries)
+        apply_batch_job = cron.wait_for_job()
+        assert applied == []
+
+        apply_batch_job()
+        assert applied == [[2]]
+        timings = core.settings_files.load_timings
+        assert all(timings[entry.name].loads >= 1 for entry in entries)
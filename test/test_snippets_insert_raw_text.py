@@ -0,0 +1,56 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from talon import actions
+
+    from core.snippets.snippets_insert_raw_text import Stop, parse_snippet
+
+    def setup_function():
+        actions.reset_test_actions()
+
+    def test_moves_cursor_to_first_stop():
+        text, stop = parse_snippet("def $1($2):\n\t$0")
+
+        assert text == "def ():\n    "
+        assert stop == Stop(name="1", rows_up=1, columns_left=3, row=0, col=4)
+
+    def test_inserts_stop_defaults():
+        text, stop = parse_snippet("for ${1:k}, ${2:v} in pairs($3) do\n\t$0\nend")
+
+        assert text == "for k, v in pairs() do\n    \nend"
+        assert stop == Stop(name="1", rows_up=2, columns_left=18, row=0, col=4)
+
+        text, stop = parse_snippet("${2:outer ${1:inner}} x")
+
+        assert text == "outer inner x"
+        assert stop == Stop(name="1", rows_up=0, columns_left=7, row=0, col=6)
+
+    def test_stop_number_ends_before_letters():
+        text, stop = parse_snippet("class $2Actions($1):")
+
+        assert text == "class Actions():"
+        assert stop == Stop(name="1", rows_up=0, columns_left=2, row=0, col=14)
+
+    def test_no_stop_at_end_of_snippet():
+        assert parse_snippet("return $0") == ("return ", None)
+        assert parse_snippet("cost: $") == ("cost: $", None)
+
+    def test_only_fetches_referenced_variables():
+        calls = []
+
+        def clip_text():
+            calls.append("clip")
+            return "copied"
+
+        actions.register_test_action("clip", "text", clip_text)
+
+        assert parse_snippet("print($1)")[0] == "print()"
+        assert calls == []
+
+        assert parse_snippet("print($CLIPBOARD$0)") == (
+            "print(copied)",
+            Stop("0", 0, 1, 0, 12),
+        )
+        assert calls == ["clip"]
@@ -0,0 +1,50 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from core.snippets.snippets_lint import find_cross_file_problems
+
+    def snippet(name, languages, phrases):
+        return {"name": name, "languages": languages, "phrases": phrases}
+
+    def test_reports_unknown_languages():
+        results = [
+            {
+                "file": "a.snippet",
+                "snippets": [snippet("ifStatement", ["python", "klingon"], ["if"])],
+            }
+        ]
+
+        problems = find_cross_file_problems(results, {"python"})
+        assert [(p["kind"], p["message"]) for p in problems] == [
+            (
+                "unknown_language",
+                "Snippet 'ifStatement' has unknown language 'klingon'",
+            )
+        ]
+
+    def test_reports_phrases_shared_by_snippets_in_a_language():
+        results = [
+            {
+                "file": "global.snippet",
+                "snippets": [snippet("link", None, ["link"])],
+            },
+            {
+                "file": "python.snippet",
+                "snippets": [
+                    snippet("ifStatement", ["python"], ["if"]),
+                    snippet("linkComment", ["python"], ["link"]),
+                    snippet("ifStatement", ["python"], ["if"]),
+                ],
+            },
+        ]
+
+        problems = find_cross_file_problems(results, {"python"})
+        assert [(p["kind"], p["file"], p["message"]) for p in problems] == [
+            (
+                "duplicate_phrase",
+                "global.snippet, python.snippet",
+                "Phrase 'link' in language 'python' is used by snippets ['link', 'linkComment']",
+            )
+        ]
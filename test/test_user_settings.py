@@ -0,0 +1,112 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    import io
+    import os
+    from pathlib import Path
+
+    import pytest
+
+    import core.user_settings
+    from core.user_settings import (
+        CsvListDiff,
+        TrackedCsvList,
+        append_atomically,
+        update_csv_list,
+    )
+
+    HEADERS = ("Abbreviation", "Spoken Form")
+
+    def csv_file(content: str) -> io.StringIO:
+        f = io.StringIO(content)
+        f.name = "abbreviations.csv"
+        return f
+
+    def test_skips_unchanged_content():
+        tracked = TrackedCsvList(HEADERS)
+        content = "Abbreviation,Spoken Form\nsrc,source\n"
+
+        assert tracked.update(csv_file(content)) == CsvListDiff(added={"source": "src"})
+        assert tracked.update(csv_file(content)) is None
+        assert tracked.mapping == {"source": "src"}
+
+    def test_reports_added_removed_and_changed_keys():
+        tracked = TrackedCsvList(HEADERS)
+        tracked.update(
+            csv_file("Abbreviation,Spoken Form\nsrc,source\nvol,volume\nwin,window\n")
+        )
+
+        diff = tracked.update(
+            csv_file("Abbreviation,Spoken Form\nsrc,source\nv,volume\nwww,web\n")
+        )
+        assert diff == CsvListDiff(
+            added={"web": "www"}, removed={"window": "win"}, changed={"volume": "v"}
+        )
+        assert tracked.mapping == {"source": "src", "volume": "v", "web": "www"}
+
+    def test_update_csv_list_replaces_existing_rows(tmp_path, monkeypatch):
+        monkeypatch.setattr(core.user_settings, "SETTINGS_DIR", tmp_path)
+        path = tmp_path / "delays.csv"
+        path.write_text("Delay,App name\n10,Code\n20,Firefox\n", encoding="utf-8")
+
+        update_csv_list("delays.csv", ("Delay", "App name"), {"Code": "0"})
+        update_csv_list("delays.csv", ("Delay", "App name"), {"Code": "25"})
+
+        assert path.read_text(encoding="utf-8").splitlines() == [
+            "Delay,App name",
+            "25,Code",
+            "20,Firefox",
+        ]
+        assert [p.name for p in tmp_path.iterdir()] == ["delays.csv"]
+
+    def append_text(path, text: str):
+        with append_atomically(path) as (file, needs_newline):
+            if needs_newline:
+                file.write("\n")
+            file.write(text)
+
+    def test_append_atomically_to_empty_file(tmp_path):
+        path = tmp_path / "words.csv"
+        path.write_text("", encoding="utf-8")
+
+        append_text(path, "one\n")
+
+        assert path.read_text(encoding="utf-8") == "one\n"
+
+    def test_append_atomically_adds_missing_newline(tmp_path):
+        path = tmp_path / "words.csv"
+        path.write_text("one\ntwo", encoding="utf-8")
+
+        append_text(path, "three\n")
+
+        assert path.read_text(encoding="utf-8") == "one\ntwo\nthree\n"
+
+    def test_append_atomically_removes_copy_on_error(tmp_path):
+        path = tmp_path / "words.csv"
+        path.write_text("one\n", encoding="utf-8")
+
+        with pytest.raises(RuntimeError):
+            with append_atomically(path) as (file, _):
+                file.write("two\n")
+                raise RuntimeError()
+
+        assert path.read_text(encoding="utf-8") == "one\n"
+        assert [p.name for p in tmp_path.iterdir()] == ["words.csv"]
+
+    def test_append_atomically_replaces_file_once(tmp_path, monkeypatch):
+        path = tmp_path / "words.csv"
+        path.write_text("one\n", encoding="utf-8")
+        replaced = []
+        replace = os.replace
+
+        def record_replace(src, dst):
+            replaced.append((Path(src).name, Path(dst).name))
+            replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", record_replace)
+        append_text(path, "two\nthree\n")
+
+        assert replaced == [(".words.csv.tmp", "words.csv")]
+        assert path.read_text(encoding="utf-8") == "one\ntwo\nthree\n"
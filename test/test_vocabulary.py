@@ -0,0 +1,31 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from core.vocabulary.vocabulary import (
+        is_safe_spoken_form,
+        write_vocabulary_entries,
+    )
+
+    def test_rejects_spoken_forms_that_break_talon_lists():
+        assert is_safe_spoken_form("new york")
+        assert is_safe_spoken_form("e-mail")
+        for spoken_form in ["c: drive", "c # sharp", "it's", '"quoted"', "-dash"]:
+            assert not is_safe_spoken_form(spoken_form), spoken_form
+        assert not is_safe_spoken_form("two\nlines")
+
+    def test_writes_vocabulary_entries(tmp_path):
+        path = tmp_path / "vocabulary.talon-list"
+        path.write_text("list: user.vocabulary\n-\nsequel: SQL", encoding="utf-8")
+
+        write_vocabulary_entries(
+            path, {"talon": "talon", "new york": "New York", "dont": "don't"}
+        )
+
+        assert path.read_text(encoding="utf-8").splitlines()[2:] == [
+            "sequel: SQL",
+            "talon",
+            "new york: New York",
+            'dont: "don\'t"',
+        ]
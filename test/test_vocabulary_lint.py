@@ -0,0 +1,40 @@
+import talon
+
+if hasattr(talon, "test_mode"):
+    # Only include this when we're running tests
+
+    from core.vocabulary.vocabulary_lint import (
+        estimate_savings,
+        find_overlaps,
+        find_rewritten_vocabulary,
+        find_unreachable_replacements,
+    )
+
+    def test_finds_duplicates_and_conflicts():
+        problems = find_overlaps(
+            {
+                "vocabulary.talon-list": {"sequel": "SQL", "witch": "which"},
+                "abbreviations.csv": {"sequel": "sql"},
+                "words_to_replace.csv": {"witch": "which"},
+            }
+        )
+
+        assert [(p["kind"], p["spoken_form"], p["sources"]) for p in problems] == [
+            ("conflict", "sequel", ["abbreviations.csv", "vocabulary.talon-list"]),
+            ("duplicate", "witch", ["vocabulary.talon-list", "words_to_replace.csv"]),
+        ]
+        assert estimate_savings(problems) == {"spoken_forms": 1, "words": 1}
+
+    def test_finds_unreachable_replacements():
+        problems = find_unreachable_replacements(
+            {"drowze": "drowze", "new  york": "NY", "new york": "New York"}
+        )
+
+        assert [p["spoken_form"] for p in problems] == ["drowze", "new  york"]
+
+    def test_finds_rewritten_vocabulary():
+        problems = find_rewritten_vocabulary(
+            {"sequel": "SQL", "big apple": "new york"}, {"new york": "New York"}
+        )
+
+        assert [p["spoken_form"] for p in problems] == ["big apple"]